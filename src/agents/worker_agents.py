@@ -57,7 +57,7 @@ def create_patent_agent(tools: list = None) -> Agent:
 
 def create_exim_agent(tools: list = None) -> Agent:
     """Create the EXIM Trade Analyst agent."""
-    from src.tools.exim_tool import query_exim_trade, analyze_supply_chain
+    from src.tools.exim_tool import query_exim_trade, analyze_supply_chain, gather_molecule_intel
     
     return Agent(
         role="Supply Chain & Trade Analyst",
@@ -66,7 +66,7 @@ def create_exim_agent(tools: list = None) -> Agent:
         You track import volumes, source countries, and pricing trends to identify supply risks and opportunities.
         You advise on China dependency risks, alternate sourcing, and backward integration opportunities.
         You always consider geopolitical factors affecting pharmaceutical supply chains.""",
-        tools=tools or [query_exim_trade, analyze_supply_chain],
+        tools=tools or [query_exim_trade, analyze_supply_chain, gather_molecule_intel],
         llm=get_llm(),
         verbose=True,
         allow_delegation=False
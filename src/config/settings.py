@@ -34,6 +34,13 @@ class Settings:
     DATA_API_KEY: str = os.getenv("DATA_API_KEY", "")
     TAVILY_API_KEY: str = os.getenv("TAVILY_API_KEY", "")
     RAG_CACHE_TTL: int = int(os.getenv("RAG_CACHE_TTL", "1800"))
+
+    # Tool data caching and query bounds (all clamped to at least 1)
+    PHARMA_TOOLS_CACHE_TTL: int = max(1, int(os.getenv("PHARMA_TOOLS_CACHE_TTL", "300")))
+    TOOL_CACHE_TTL: int = max(1, int(os.getenv("TOOL_CACHE_TTL", "300")))
+    DB_QUERY_ROW_LIMIT: int = max(1, int(os.getenv("DB_QUERY_ROW_LIMIT", "500")))
+    # Use DB market rows on their own, skipping the IQVIA JSON merge (fully seeded DBs)
+    PHARMA_DISABLE_JSON_MERGE: bool = os.getenv("PHARMA_DISABLE_JSON_MERGE", "false").lower() == "true"
     
     # Application Settings
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
@@ -4,7 +4,7 @@ Uses SQLite for simplicity, easily swappable to PostgreSQL.
 """
 import os
 from pathlib import Path
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from contextlib import contextmanager
 
@@ -17,20 +17,57 @@ DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 # Database URL - can be overridden with environment variable
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DB_PATH}")
 
+# Connection pool sizing for server databases; agents run tools concurrently
+# and each tool call opens a session, so keep connections warm between calls
+POOL_OPTIONS = {} if "sqlite" in DATABASE_URL else {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "5")),
+    "pool_pre_ping": True,
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+}
+
 # Create engine
 engine = create_engine(
     DATABASE_URL,
     echo=False,  # Set to True for SQL debugging
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
+    **POOL_OPTIONS
 )
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+# Trigram indexes backing the tools' case-insensitive substring searches
+TRIGRAM_INDEXES = {
+    "idx_clinical_trials_indication_trgm": ("clinical_trials", "indication"),
+    "idx_clinical_trials_therapy_area_trgm": ("clinical_trials", "therapy_area"),
+    "idx_clinical_trials_drug_name_trgm": ("clinical_trials", "drug_name"),
+    "idx_competitors_molecule_trgm": ("competitors", "molecule"),
+    "idx_competitors_competitor_name_trgm": ("competitors", "competitor_name"),
+    "idx_market_data_molecule_trgm": ("market_data", "molecule"),
+    "idx_market_data_region_trgm": ("market_data", "region"),
+    "idx_market_data_therapy_area_trgm": ("market_data", "therapy_area"),
+    "idx_trade_data_molecule_trgm": ("trade_data", "molecule"),
+}
+
+
+def create_search_indexes():
+    """Create pg_trgm GIN indexes so ILIKE '%x%' filters avoid full table scans (PostgreSQL only)."""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for index_name, (table, column) in TRIGRAM_INDEXES.items():
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gin ({column} gin_trgm_ops)"
+            ))
+
+
 def init_database():
     """Initialize database tables."""
     Base.metadata.create_all(bind=engine)
+    create_search_indexes()
     print(f"✅ Database initialized: {DB_PATH}")
 
 
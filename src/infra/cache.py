@@ -1,36 +1,76 @@
+import threading
 import time
-from typing import Optional
+from collections import OrderedDict
+from typing import Callable, Optional
 
 from .redis_client import get_redis_client
 
 
 class RedisCache:
-    """Simple cache facade using Redis when available, else in-memory."""
+    """Simple cache facade using Redis when available, else a bounded in-memory LRU."""
 
-    def __init__(self):
-        self.client = get_redis_client()
-        self._memory = {}
+    def __init__(self, maxsize: int = 1024, client: Optional[object] = None):
+        self.client = client if client is not None else get_redis_client()
+        self.maxsize = maxsize
+        # key -> (value, expiry); least recently used first
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
 
     def get(self, key: str) -> Optional[str]:
         if self.client:
-            val = self.client.get(key)
-            return val
-        entry = self._memory.get(key)
-        if not entry:
-            return None
-        value, exp = entry
-        if exp and exp < time.time():
-            self._memory.pop(key, None)
-            return None
-        return value
+            try:
+                return self.client.get(key)
+            except Exception:
+                # Treat an unreachable Redis as a cache miss
+                return None
+        with self._lock:
+            entry = self._memory.get(key)
+            if not entry:
+                return None
+            value, exp = entry
+            if exp and exp < time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return value
 
     def set(self, key: str, value: str, ttl_seconds: int = 1800):
         if self.client:
-            self.client.setex(key, ttl_seconds, value)
+            try:
+                self.client.setex(key, ttl_seconds, value)
+            except Exception:
+                pass
             return
         exp = time.time() + ttl_seconds if ttl_seconds else None
-        self._memory[key] = (value, exp)
+        with self._lock:
+            self._memory[key] = (value, exp)
+            self._memory.move_to_end(key)
+            if len(self._memory) > self.maxsize:
+                self._evict()
 
+    def _evict(self):
+        """Drop expired entries, then least recently used ones, until within maxsize."""
+        now = time.time()
+        expired = [key for key, (_, exp) in self._memory.items() if exp and exp < now]
+        for key in expired:
+            del self._memory[key]
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def get_or_set(self, key: str, compute: Callable[[], str], ttl_seconds: int = 1800) -> str:
+        """Return the cached value for key, computing and storing it on a miss."""
+        cached = self.get(key)
+        if cached:
+            return cached.decode() if isinstance(cached, bytes) else cached
+        value = compute()
+        if value:
+            self.set(key, value, ttl_seconds=ttl_seconds)
+        return value
 
-redis_cache = RedisCache()
 
+def make_key(prefix: str, *parts: Optional[str]) -> str:
+    """Cache key for a rendered lookup; None and "" are alike, but case is kept since output echoes it."""
+    return prefix + ":" + "|".join(part or "" for part in parts)
+
+
+redis_cache = RedisCache()
@@ -1,3 +1,4 @@
+import os
 from functools import lru_cache
 from typing import Optional
 
@@ -7,3 +8,21 @@ def get_redis_client() -> Optional[object]:
     """Return None when Redis is not used/available."""
     return None
 
+
+@lru_cache(maxsize=1)
+def get_shared_redis_client() -> Optional[object]:
+    """
+    Return a client for REDIS_URL, for caches shared across workers, or None when unset.
+    The connection is opened on first use, so an unreachable Redis only fails its callers.
+    """
+    url = os.getenv("REDIS_URL")
+    if not url:
+        return None
+    try:
+        import redis
+
+        return redis.Redis.from_url(
+            url, decode_responses=True, socket_connect_timeout=1, socket_timeout=1
+        )
+    except Exception:
+        return None
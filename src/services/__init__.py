@@ -1,11 +1,12 @@
 # Services Module
 from .rag_service import RAGService, get_rag_service
-from .report_generator import ReportGenerator, generate_pdf_report, generate_excel_report
+from .report_generator import ReportGenerator, generate_pdf_report, generate_excel_report, generate_reports_batch
 
 __all__ = [
     "RAGService",
     "get_rag_service",
     "ReportGenerator",
     "generate_pdf_report",
-    "generate_excel_report"
+    "generate_excel_report",
+    "generate_reports_batch"
 ]
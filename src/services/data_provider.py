@@ -112,7 +112,10 @@ def _tavily_search(query: str, max_results: int = 3) -> Optional[List[Dict[str,
     if not settings.TAVILY_API_KEY:
         return None
     try:
+        from src.services.rate_limiter import tavily_throttle
+
         client = TavilyClient(api_key=settings.TAVILY_API_KEY)
+        tavily_throttle.wait()
         res = client.search(query=query, max_results=max_results, search_depth="advanced", include_answer=True)
         return res.get("results", [])
     except Exception:
@@ -2,8 +2,10 @@
 Rate Limiting Service.
 Tracks API usage and enforces limits to prevent quota exhaustion.
 """
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple
+import threading
 import time
 
 from ..database.db import get_db_session
@@ -190,6 +192,35 @@ class RateLimitExceeded(Exception):
     pass
 
 
+class WindowThrottle:
+    """
+    In-process sliding-window limiter for short-term API caps.
+    Unlike RateLimiter, callers block until a slot frees up instead of failing.
+    """
+    
+    def __init__(self, calls: int, period: float):
+        self.calls = calls
+        self.period = period
+        self._stamps = deque()
+        self._lock = threading.Lock()
+    
+    def wait(self):
+        """Block until another call fits in the window, then record it."""
+        with self._lock:
+            now = time.monotonic()
+            while self._stamps and now - self._stamps[0] >= self.period:
+                self._stamps.popleft()
+            if len(self._stamps) >= self.calls:
+                # Sleep until the oldest call leaves the window
+                time.sleep(self.period - (now - self._stamps.popleft()))
+                now = time.monotonic()
+            self._stamps.append(now)
+
+
+# Tavily allows 20 requests per minute; stay just under it
+tavily_throttle = WindowThrottle(calls=18, period=60)
+
+
 # Lightweight Redis-backed token bucket for Groq calls
 def allow_groq_call(user_id: Optional[str] = None, rate: int = 5, burst: int = 10) -> bool:
     """
@@ -2,8 +2,10 @@
 Report Generator Service
 Generate PDF and Excel reports from agent analysis.
 """
+import io
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any
@@ -26,52 +28,126 @@ except ImportError:
     print("openpyxl not installed. Excel generation disabled.")
 
 
+# Common unicode characters mapped to ASCII equivalents, built once at import
+_PDF_REPLACEMENTS = {
+    '\u2022': '-',  # bullet
+    '\u2019': "'",  # right single quote
+    '\u2018': "'",  # left single quote
+    '\u201c': '"',  # left double quote
+    '\u201d': '"',  # right double quote
+    '\u2013': '-',  # en dash
+    '\u2014': '-',  # em dash
+    '\u2026': '...',  # ellipsis
+    '\u00a0': ' ',  # non-breaking space
+    '\u00b7': '-',  # middle dot
+    '\u2192': '->',  # right arrow
+    '\u2190': '<-',  # left arrow
+    '\u2713': '[x]',  # checkmark
+    '\u2717': '[ ]',  # cross mark
+    '\u00ae': '(R)',  # registered
+    '\u2122': '(TM)',  # trademark
+    '\u00a9': '(C)',  # copyright
+    '\u00b0': ' degrees',  # degree symbol
+    '\u00b1': '+/-',  # plus-minus
+    '\u00d7': 'x',  # multiplication
+    '\u00f7': '/',  # division
+    '\u221e': 'infinity',  # infinity
+    '\u2264': '<=',  # less than or equal
+    '\u2265': '>=',  # greater than or equal
+    '\u2605': '*',  # black star
+    '\u2606': '*',  # white star
+}
+_PDF_TRANSLATE_TABLE = str.maketrans(_PDF_REPLACEMENTS)
+
+
 def clean_text_for_pdf(text: str) -> str:
     """Clean text for PDF generation - handle unicode and special characters."""
     if not text:
         return ""
-    # Replace common unicode characters with ASCII equivalents
-    replacements = {
-        '\u2022': '-',  # bullet
-        '\u2019': "'",  # right single quote
-        '\u2018': "'",  # left single quote
-        '\u201c': '"',  # left double quote
-        '\u201d': '"',  # right double quote
-        '\u2013': '-',  # en dash
-        '\u2014': '-',  # em dash
-        '\u2026': '...',  # ellipsis
-        '\u00a0': ' ',  # non-breaking space
-        '\u00b7': '-',  # middle dot
-        '\u2192': '->',  # right arrow
-        '\u2190': '<-',  # left arrow
-        '\u2713': '[x]',  # checkmark
-        '\u2717': '[ ]',  # cross mark
-        '\u00ae': '(R)',  # registered
-        '\u2122': '(TM)',  # trademark
-        '\u00a9': '(C)',  # copyright
-        '\u00b0': ' degrees',  # degree symbol
-        '\u00b1': '+/-',  # plus-minus
-        '\u00d7': 'x',  # multiplication
-        '\u00f7': '/',  # division
-        '\u221e': 'infinity',  # infinity
-        '\u2264': '<=',  # less than or equal
-        '\u2265': '>=',  # greater than or equal
-        '•': '-',
-        '→': '->',
-        '←': '<-',
-        '✓': '[x]',
-        '✗': '[ ]',
-        '★': '*',
-        '☆': '*',
-    }
-    for unicode_char, ascii_char in replacements.items():
-        text = text.replace(unicode_char, ascii_char)
+    # Replace common unicode characters with ASCII equivalents in a single pass
+    text = text.translate(_PDF_TRANSLATE_TABLE)
     
     # Remove any remaining non-ASCII characters or replace with ?
     text = text.encode('ascii', 'replace').decode('ascii')
     return text
 
 
+# Content styles as (font family, style, size) and RGB text colour
+_BODY_FONT = ("Helvetica", "", 11)
+_BODY_COLOR = (0, 0, 0)
+_HEADING_COLOR = (0, 51, 102)
+_H3_FONT = ("Helvetica", "B", 11)
+_H2_FONT = ("Helvetica", "B", 12)
+_NUMBERED_SEPARATORS = (". ", ") ")
+# Deletes every '*' (bold and italic markers) in one pass
+_STRIP_EMPHASIS = str.maketrans("", "", "*")
+
+
+class _PdfStyle:
+    """Track the active font/colour so redundant fpdf state changes are skipped."""
+    
+    def __init__(self, pdf):
+        self.pdf = pdf
+        self.font = None
+        self.color = None
+    
+    def apply(self, font: tuple, color: tuple):
+        """Switch font and text colour only when they differ from the current ones."""
+        if self.font != font:
+            self.pdf.set_font(*font)
+            self.font = font
+        if self.color != color:
+            self.pdf.set_text_color(*color)
+            self.color = color
+
+
+def _render_h3(pdf, style: _PdfStyle, line: str):
+    """Render a '### ' markdown header."""
+    style.apply(_H3_FONT, _HEADING_COLOR)
+    pdf.multi_cell(0, 7, line[4:].replace("**", ""))
+
+
+def _render_h2(pdf, style: _PdfStyle, line: str):
+    """Render a '## ' markdown header."""
+    style.apply(_H2_FONT, _HEADING_COLOR)
+    pdf.multi_cell(0, 8, line[3:].replace("**", ""))
+
+
+def _render_bullet(pdf, style: _PdfStyle, line: str):
+    """Render a '- ' or '* ' bullet point."""
+    style.apply(_BODY_FONT, _BODY_COLOR)
+    pdf.set_x(15)
+    text = line[2:].translate(_STRIP_EMPHASIS)
+    pdf.multi_cell(0, 6, f"- {text}")
+
+
+def _render_default(pdf, style: _PdfStyle, line: str):
+    """Render bold headers, numbered items and regular text."""
+    # Handle bold headers
+    if line.startswith("**") and line.endswith("**"):
+        style.apply(_H2_FONT, _HEADING_COLOR)
+        pdf.multi_cell(0, 8, line.replace("**", ""))
+        return
+    
+    style.apply(_BODY_FONT, _BODY_COLOR)
+    # Handle numbered items
+    if len(line) > 2 and "0" <= line[0] <= "9" and line[1:3] in _NUMBERED_SEPARATORS:
+        pdf.set_x(15)
+        pdf.multi_cell(0, 6, line.translate(_STRIP_EMPHASIS))
+    # Regular text
+    else:
+        pdf.multi_cell(0, 6, line.translate(_STRIP_EMPHASIS))
+
+
+# Line renderers keyed on markdown prefix (checked as 4, 3 then 2 chars)
+_PREFIX_DISPATCH = {
+    "### ": _render_h3,
+    "## ": _render_h2,
+    "- ": _render_bullet,
+    "* ": _render_bullet,
+}
+
+
 class ReportGenerator:
     """Generate professional reports from agent analysis."""
     
@@ -86,7 +162,8 @@ class ReportGenerator:
         title: str,
         query: str,
         content: str,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        filename: Optional[str] = None
     ) -> str:
         """
         Generate a PDF report.
@@ -96,6 +173,7 @@ class ReportGenerator:
             query: Original user query
             content: Main report content (markdown-like text)
             metadata: Optional metadata (date, agents used, etc.)
+            filename: Optional output file name (defaults to a timestamped name)
         
         Returns:
             Path to generated PDF file
@@ -155,54 +233,28 @@ class ReportGenerator:
             pdf.ln(3)
             
             # Main content
-            pdf.set_font("Helvetica", "", 11)
-            pdf.set_text_color(0, 0, 0)
+            style = _PdfStyle(pdf)
+            style.apply(_BODY_FONT, _BODY_COLOR)
             
-            # Process content line by line
-            lines = content.split("\n")
-            for line in lines:
+            # Process content line by line, streaming instead of splitting up front
+            for line in io.StringIO(content):
                 line = line.strip()
                 
                 if not line:
                     pdf.ln(3)
                     continue
                 
-                # Handle markdown headers (##, ###)
-                if line.startswith("### "):
-                    pdf.set_font("Helvetica", "B", 11)
-                    pdf.set_text_color(0, 51, 102)
-                    pdf.multi_cell(0, 7, line[4:].replace("**", ""))
-                    pdf.set_font("Helvetica", "", 11)
-                    pdf.set_text_color(0, 0, 0)
-                elif line.startswith("## "):
-                    pdf.set_font("Helvetica", "B", 12)
-                    pdf.set_text_color(0, 51, 102)
-                    pdf.multi_cell(0, 8, line[3:].replace("**", ""))
-                    pdf.set_font("Helvetica", "", 11)
-                    pdf.set_text_color(0, 0, 0)
-                # Handle bold headers
-                elif line.startswith("**") and line.endswith("**"):
-                    pdf.set_font("Helvetica", "B", 12)
-                    pdf.set_text_color(0, 51, 102)
-                    pdf.multi_cell(0, 8, line.replace("**", ""))
-                    pdf.set_font("Helvetica", "", 11)
-                    pdf.set_text_color(0, 0, 0)
-                
-                # Handle bullet points
-                elif line.startswith("- ") or line.startswith("* "):
-                    pdf.set_x(15)
-                    text = line[2:].replace("**", "").replace("*", "")
-                    pdf.multi_cell(0, 6, f"- {text}")
-                
-                # Handle numbered items
-                elif len(line) > 2 and line[0].isdigit() and line[1:3] in [". ", ") "]:
-                    pdf.set_x(15)
-                    pdf.multi_cell(0, 6, line.replace("**", "").replace("*", ""))
-                
-                # Regular text
-                else:
-                    clean_line = line.replace("**", "").replace("*", "")
-                    pdf.multi_cell(0, 6, clean_line)
+                handler = (
+                    _PREFIX_DISPATCH.get(line[:4])
+                    or _PREFIX_DISPATCH.get(line[:3])
+                    or _PREFIX_DISPATCH.get(line[:2])
+                    or _render_default
+                )
+                handler(pdf, style, line)
+            
+            # StringIO yields no final empty line; keep the spacing split() gave
+            if not content or content.endswith("\n"):
+                pdf.ln(3)
             
             # Footer
             pdf.ln(10)
@@ -211,7 +263,8 @@ class ReportGenerator:
             pdf.cell(0, 10, "Generated by Pharma Agentic AI System", ln=True, align="C")
             
             # Save PDF
-            filename = f"pharma_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            if not filename:
+                filename = f"pharma_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
             filepath = self.output_dir / filename
             pdf.output(str(filepath))
             
@@ -226,7 +279,8 @@ class ReportGenerator:
         title: str,
         query: str,
         data: Dict[str, Any],
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        filename: Optional[str] = None
     ) -> str:
         """
         Generate an Excel report with structured data.
@@ -236,6 +290,7 @@ class ReportGenerator:
             query: Original user query
             data: Dictionary containing structured data for different sections
             metadata: Optional metadata
+            filename: Optional output file name (defaults to a timestamped name)
         
         Returns:
             Path to generated Excel file
@@ -280,35 +335,21 @@ class ReportGenerator:
                 ws["A5"] = "Agents Used:"
                 ws["B5"] = ", ".join(metadata["agents_used"])
             
-            # Main findings
+            # Main findings / recommendations share one wrap style
+            wrap_alignment = Alignment(wrap_text=True)
             row = 7
-            ws[f"A{row}"] = "Key Findings"
-            ws[f"A{row}"].font = header_font
-            ws[f"A{row}"].fill = header_fill
-            ws.merge_cells(f"A{row}:F{row}")
-            
-            row += 1
-            if "findings" in data:
-                for finding in data["findings"]:
-                    ws[f"A{row}"] = f"• {finding}"
-                    ws[f"A{row}"].alignment = Alignment(wrap_text=True)
-                    ws.merge_cells(f"A{row}:F{row}")
-                    row += 1
-            
-            # Recommendations
-            row += 1
-            ws[f"A{row}"] = "Recommendations"
-            ws[f"A{row}"].font = header_font
-            ws[f"A{row}"].fill = header_fill
-            ws.merge_cells(f"A{row}:F{row}")
-            
-            row += 1
-            if "recommendations" in data:
-                for rec in data["recommendations"]:
-                    ws[f"A{row}"] = f"• {rec}"
-                    ws[f"A{row}"].alignment = Alignment(wrap_text=True)
-                    ws.merge_cells(f"A{row}:F{row}")
+            for section_title, key in (("Key Findings", "findings"), ("Recommendations", "recommendations")):
+                cell = ws.cell(row=row, column=1, value=section_title)
+                cell.font = header_font
+                cell.fill = header_fill
+                ws.merge_cells(start_row=row, start_column=1, end_row=row, end_column=6)
+                
+                row += 1
+                for item in data.get(key, ()):
+                    ws.cell(row=row, column=1, value=f"• {item}").alignment = wrap_alignment
+                    ws.merge_cells(start_row=row, start_column=1, end_row=row, end_column=6)
                     row += 1
+                row += 1
             
             # Set column widths
             ws.column_dimensions["A"].width = 20
@@ -328,7 +369,8 @@ class ReportGenerator:
                 self._add_data_sheet(wb, "Competitor Intel", data["competitor_data"], header_fill, header_font, thin_border)
             
             # Save Excel
-            filename = f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+            if not filename:
+                filename = f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             filepath = self.output_dir / filename
             wb.save(str(filepath))
             
@@ -380,3 +422,71 @@ def generate_excel_report(title: str, query: str, data: Dict[str, Any], metadata
     """Convenience function to generate Excel report."""
     generator = ReportGenerator()
     return generator.generate_excel(title, query, data, metadata)
+
+
+# Per-process generator used by batch workers
+_worker_generator: Optional[ReportGenerator] = None
+
+
+def _init_report_worker(output_dir: Optional[str] = None):
+    """Set up a generator once per worker so fpdf/openpyxl warm-up is paid once."""
+    global _worker_generator
+    _worker_generator = ReportGenerator(output_dir)
+
+
+def _run_report_job(job: Dict[str, Any]) -> str:
+    """Render a single batch job in a worker process."""
+    generator = _worker_generator or ReportGenerator()
+    kind = job.get("kind", "pdf")
+    if kind == "pdf":
+        return generator.generate_pdf(
+            job.get("title", ""), job.get("query", ""), job.get("content", ""),
+            job.get("metadata"), filename=job.get("filename")
+        )
+    if kind == "excel":
+        return generator.generate_excel(
+            job.get("title", ""), job.get("query", ""), job.get("data", {}),
+            job.get("metadata"), filename=job.get("filename")
+        )
+    return f"Unknown report kind: {kind}"
+
+
+def generate_reports_batch(
+    jobs: List[Dict[str, Any]],
+    max_workers: Optional[int] = None,
+    output_dir: Optional[str] = None
+) -> List[str]:
+    """
+    Generate many PDF/Excel reports in parallel across processes.
+    
+    Args:
+        jobs: Job dicts with "kind" ("pdf" or "excel"), "title", "query",
+            "content" (pdf) or "data" (excel), and optional "metadata"/"filename"
+        max_workers: Worker process count (defaults to CPU count)
+        output_dir: Optional output directory shared by all jobs
+    
+    Returns:
+        Paths (or error messages) in the same order as jobs
+    """
+    if not jobs:
+        return []
+    
+    # Timestamped default names only have second resolution, so give each
+    # job a unique name up front to keep parallel outputs from colliding.
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    prepared = []
+    for i, job in enumerate(jobs, 1):
+        job = dict(job)
+        if not job.get("filename"):
+            if job.get("kind", "pdf") == "excel":
+                job["filename"] = f"report_{timestamp}_{i}.xlsx"
+            else:
+                job["filename"] = f"pharma_report_{timestamp}_{i}.pdf"
+        prepared.append(job)
+    
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_report_worker,
+        initargs=(output_dir,)
+    ) as executor:
+        return list(executor.map(_run_report_job, prepared))
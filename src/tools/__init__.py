@@ -1,11 +1,17 @@
 # Tools Module - Data Source Interfaces
-from .iqvia_tool import query_iqvia_market
-from .patent_tool import query_patents
-from .exim_tool import query_exim_trade
-from .clinical_tool import query_clinical_trials
-from .social_tool import query_social_media
-from .competitor_tool import query_competitor_intel
-from .internal_tool import search_internal_docs
+# Tools are imported on first access (PEP 562), so importing one tool module,
+# e.g. src.tools.web_tool for its data helpers, doesn't pull in every tool and crewai
+from importlib import import_module
+
+_TOOL_MODULES = {
+    "query_iqvia_market": ".iqvia_tool",
+    "query_patents": ".patent_tool",
+    "query_exim_trade": ".exim_tool",
+    "query_clinical_trials": ".clinical_tool",
+    "query_social_media": ".social_tool",
+    "query_competitor_intel": ".competitor_tool",
+    "search_internal_docs": ".internal_tool",
+}
 
 __all__ = [
     "query_iqvia_market",
@@ -16,3 +22,11 @@ __all__ = [
     "query_competitor_intel",
     "search_internal_docs",
 ]
+
+
+def __getattr__(name):
+    if name not in _TOOL_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_TOOL_MODULES[name], __name__), name)
+    globals()[name] = value
+    return value
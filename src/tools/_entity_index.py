@@ -0,0 +1,55 @@
+"""
+Entity Keyword Index
+Single-pass keyword matching shared by the tool entity extractors.
+"""
+import re
+from typing import Optional
+
+
+def build_matcher(table: dict):
+    """Compile a keyword -> label table into one regex that finds every keyword in a single scan."""
+    ranked = {keyword: (rank, label) for rank, (keyword, label) in enumerate(table.items())}
+    # Alternatives are tried in priority order at each position, so every
+    # match is the highest-priority keyword starting there.
+    alternation = "|".join(re.escape(keyword) for keyword in ranked)
+    return re.compile(f"(?=({alternation}))"), ranked
+
+
+def best_match(matcher, text: str) -> Optional[str]:
+    """Return the label of the highest-priority keyword contained in text."""
+    pattern, ranked = matcher
+    best = None
+    for match in pattern.finditer(text):
+        rank = ranked[match.group(1)]
+        if best is None or rank[0] < best[0]:
+            best = rank
+            if rank[0] == 0:
+                # Nothing outranks the first keyword in the table
+                break
+    return best[1] if best else None
+
+
+def flatten_keywords(groups: dict, label) -> dict:
+    """Flatten {group: [keywords]} into an ordered keyword -> label(group) table."""
+    table = {}
+    for group, keywords in groups.items():
+        for keyword in keywords:
+            # Keep the first group that lists a keyword, as a linear scan would
+            table.setdefault(keyword, label(group))
+    return table
+
+
+# Common INN stems that mark a word as a likely drug name
+DRUG_SUFFIXES = (
+    "mab", "nib", "lib", "vir", "stat", "pril", "olol", "sartan", "pine", "azole",
+    "mycin", "cillin", "done", "prazole", "gliptin", "formin", "xaban"
+)
+
+# Any whitespace-separated word with 3+ characters before a common drug suffix
+DRUG_SUFFIX_RE = re.compile(rf"(?<!\S)(\S{{3,}}(?:{'|'.join(DRUG_SUFFIXES)}))(?!\S)")
+
+
+def match_drug_suffix(query_lower: str) -> Optional[str]:
+    """Return the first word ending in a drug-name suffix, capitalized, or None."""
+    match = DRUG_SUFFIX_RE.search(query_lower.replace(",", " ").replace(".", " "))
+    return match.group(1).capitalize() if match else None
@@ -3,124 +3,253 @@ Clinical Trials Tool
 Queries database for clinical trials and pipeline analysis.
 """
 import json
-from typing import Optional
+import time
+from collections import Counter
+from functools import lru_cache
+from typing import NamedTuple, Optional
 from crewai.tools import tool
 from pathlib import Path
 import sys
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Add project root to path
 project_root = Path(__file__).resolve().parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from src.config.settings import settings
+from src.infra.cache import make_key, redis_cache
+from src.tools._entity_index import best_match, build_matcher
+
+# Upper bound on rows pulled from the database per query
+_QUERY_ROW_LIMIT = settings.DB_QUERY_ROW_LIMIT
+# Seconds a rendered tool response stays cached, keyed on resolved entities
+_TOOL_CACHE_TTL = settings.TOOL_CACHE_TTL
+# Seconds database results are reused before the DB is queried again
+_DATA_CACHE_TTL = settings.PHARMA_TOOLS_CACHE_TTL
+
+
+def _ttl_bucket() -> int:
+    """Current cache generation; advances every _DATA_CACHE_TTL seconds."""
+    return int(time.monotonic() // _DATA_CACHE_TTL)
+
+# Keyword -> canonical label tables, highest priority first
+_INDICATION_KEYWORDS = {
+    "copd": "COPD", "chronic obstructive": "COPD",
+    "asthma": "Asthma", "asthmatic": "Asthma",
+    "ipf": "IPF", "idiopathic pulmonary fibrosis": "IPF", "pulmonary fibrosis": "IPF",
+    "nsclc": "NSCLC", "non-small cell lung cancer": "NSCLC", "lung cancer": "NSCLC",
+    "melanoma": "Melanoma", "skin cancer": "Melanoma",
+    "diabetes": "Diabetes", "diabetic": "Diabetes", "t2dm": "Diabetes", "type 2 diabetes": "Diabetes",
+    "rheumatoid": "Rheumatoid Arthritis", "ra": "Rheumatoid Arthritis", "arthritis": "Rheumatoid Arthritis",
+}
+
+_THERAPY_AREA_KEYWORDS = {
+    "respiratory": "Respiratory", "lung": "Respiratory", "copd": "Respiratory",
+    "asthma": "Respiratory", "pulmonary": "Respiratory",
+    "oncology": "Oncology", "cancer": "Oncology", "tumor": "Oncology",
+    "nsclc": "Oncology", "melanoma": "Oncology",
+    "diabetes": "Diabetes", "diabetic": "Diabetes", "glucose": "Diabetes",
+    "immune": "Immunology", "autoimmune": "Immunology", "rheumatoid": "Immunology",
+}
+
+# Brand names are checked before generic molecule names
+_BRAND_TO_MOLECULE = {
+    "dolo": "Paracetamol", "dolo650": "Paracetamol",
+    "ozempic": "Semaglutide", "wegovy": "Semaglutide",
+    "humira": "Adalimumab", "keytruda": "Pembrolizumab",
+    "herceptin": "Trastuzumab", "revlimid": "Lenalidomide",
+}
+
+_KNOWN_MOLECULES = (
+    "pembrolizumab", "sitagliptin", "rivaroxaban", "pirfenidone",
+    "roflumilast", "tiotropium", "omalizumab", "fluticasone",
+    "semaglutide", "adalimumab", "trastuzumab", "lenalidomide",
+    "paracetamol", "azithromycin", "pantoprazole", "escitalopram",
+    "metformin", "atorvastatin", "amlodipine", "montelukast"
+)
+
+_MOLECULE_KEYWORDS = {
+    **_BRAND_TO_MOLECULE,
+    **{mol: mol.capitalize() for mol in _KNOWN_MOLECULES},
+}
+
+
+class Trial(NamedTuple):
+    """A single trial within an indication's active_trials list."""
+    phase: str
+    drug_name: str
+    sponsor: str
+    nct_id: str
+    status: Optional[str] = None
+    title: Optional[str] = None
+
+
+def _trial_from_dict(trial: dict) -> Trial:
+    """Build a Trial from a mock JSON trial entry."""
+    return Trial(
+        phase=trial.get("phase"),
+        drug_name=trial.get("drug_name"),
+        sponsor=trial.get("sponsor"),
+        nct_id=trial.get("nct_id"),
+        status=trial.get("status"),
+        title=trial.get("title")
+    )
+
+
+class IndicationReport(NamedTuple):
+    """Hashable snapshot of one indication entry, ready for formatting."""
+    indication: str
+    therapy_area: Optional[str]
+    competition_density: Optional[str]
+    unmet_need: Optional[str]
+    patient_burden_score: object
+    trials: tuple
+
+
+def _indication_report(entry: dict) -> IndicationReport:
+    """Freeze an indication entry (DB or JSON) into an IndicationReport."""
+    return IndicationReport(
+        entry["indication"],
+        entry.get("therapy_area", "N/A"),
+        entry.get("competition_density", "Unknown"),
+        entry.get("unmet_need", "Unknown"),
+        entry.get("patient_burden_score", "N/A"),
+        tuple(entry.get("active_trials", []))
+    )
+
+
+@lru_cache(maxsize=2048)
+def _format_indication_report(report: IndicationReport) -> str:
+    """Render one indication block of the query_clinical_trials response."""
+    trial_info = [
+        f"**{report.indication}** ({report.therapy_area})\n",
+        f"  Competition Density: {report.competition_density} | Unmet Need: {report.unmet_need} | Patient Burden: {report.patient_burden_score}\n",
+        f"  Active Trials: {len(report.trials)}\n",
+    ]
+    trial_info.extend(
+        f"    - [{trial.phase}] {trial.drug_name} (Sponsor: {trial.sponsor}) - {trial.nct_id}\n"
+        for trial in report.trials
+    )
+    return "".join(trial_info)
+
+
+# Phases / unmet-need levels that mark an attractive opportunity
+_LATE_PHASES = frozenset({"Phase III", "Phase IV"})
+_HIGH_UNMET_NEED = frozenset({"High", "Very High"})
+# Sort rank for trial phases, most advanced first
+_PHASE_ORDER = {"Phase IV": 0, "Phase III": 1, "Phase II": 2, "Phase I": 3}
+
+
+_ENTITY_MATCHERS = {
+    "indication": build_matcher(_INDICATION_KEYWORDS),
+    "therapy_area": build_matcher(_THERAPY_AREA_KEYWORDS),
+    "molecule": build_matcher(_MOLECULE_KEYWORDS),
+}
+
 
+@lru_cache(maxsize=4096)
 def _extract_entity_from_query(query: str, entity_type: str = "indication") -> str:
     """Extract entities from natural language query."""
     if not query:
         return None
     
-    query_lower = query.lower()
-    
-    if entity_type == "indication":
-        indications = {
-            "copd": ["copd", "chronic obstructive"],
-            "asthma": ["asthma", "asthmatic"],
-            "ipf": ["ipf", "idiopathic pulmonary fibrosis", "pulmonary fibrosis"],
-            "nsclc": ["nsclc", "non-small cell lung cancer", "lung cancer"],
-            "melanoma": ["melanoma", "skin cancer"],
-            "diabetes": ["diabetes", "diabetic", "t2dm", "type 2 diabetes"],
-            "rheumatoid arthritis": ["rheumatoid", "ra", "arthritis"]
-        }
-        for indication, keywords in indications.items():
-            for keyword in keywords:
-                if keyword in query_lower:
-                    return indication.upper() if indication in ["copd", "ipf", "nsclc"] else indication.title()
-    
-    elif entity_type == "therapy_area":
-        areas = {
-            "respiratory": ["respiratory", "lung", "copd", "asthma", "pulmonary"],
-            "oncology": ["oncology", "cancer", "tumor", "nsclc", "melanoma"],
-            "diabetes": ["diabetes", "diabetic", "glucose"],
-            "immunology": ["immune", "autoimmune", "rheumatoid"]
-        }
-        for area, keywords in areas.items():
-            for keyword in keywords:
-                if keyword in query_lower:
-                    return area.capitalize()
+    matcher = _ENTITY_MATCHERS.get(entity_type)
+    if matcher is None:
+        return None
+    return best_match(matcher, query.lower())
+
+
+@lru_cache(maxsize=512)
+def _fetch_trials(indication: Optional[str], therapy_area: Optional[str], molecule: Optional[str], ttl_bucket: int):
+    """Run the clinical trials query; results are memoized per filter combination and TTL bucket."""
+    from sqlalchemy import select
+    from src.database.db import get_db_session
+    from src.database.models import ClinicalTrial
     
-    elif entity_type == "molecule":
-        # Brand name mappings
-        brand_to_molecule = {
-            "dolo": "Paracetamol", "dolo650": "Paracetamol",
-            "ozempic": "Semaglutide", "wegovy": "Semaglutide",
-            "humira": "Adalimumab", "keytruda": "Pembrolizumab",
-            "herceptin": "Trastuzumab", "revlimid": "Lenalidomide"
-        }
-        for brand, mol in brand_to_molecule.items():
-            if brand in query_lower:
-                return mol
+    with get_db_session() as session:
+        # Only the columns we render, as plain rows rather than ORM entities
+        query = select(
+            ClinicalTrial.indication, ClinicalTrial.therapy_area,
+            ClinicalTrial.competition_density, ClinicalTrial.unmet_need,
+            ClinicalTrial.patient_burden_score, ClinicalTrial.phase,
+            ClinicalTrial.drug_name, ClinicalTrial.sponsor, ClinicalTrial.nct_id
+        )
         
-        known_molecules = [
-            "pembrolizumab", "sitagliptin", "rivaroxaban", "pirfenidone",
-            "roflumilast", "tiotropium", "omalizumab", "fluticasone",
-            "semaglutide", "adalimumab", "trastuzumab", "lenalidomide",
-            "paracetamol", "azithromycin", "pantoprazole", "escitalopram",
-            "metformin", "atorvastatin", "amlodipine", "montelukast"
-        ]
-        for mol in known_molecules:
-            if mol in query_lower:
-                return mol.capitalize()
-    
-    return None
+        if indication:
+            query = query.where(ClinicalTrial.indication.icontains(indication, autoescape=True))
+        if therapy_area:
+            query = query.where(ClinicalTrial.therapy_area.icontains(therapy_area, autoescape=True))
+        if molecule:
+            query = query.where(ClinicalTrial.drug_name.icontains(molecule, autoescape=True))
+        
+        # Stable order so a bounded result set is deterministic; the unfiltered
+        # load feeds the full DB+JSON merge, so it must not be truncated
+        query = query.order_by(ClinicalTrial.id)
+        if indication or therapy_area or molecule:
+            query = query.limit(_QUERY_ROW_LIMIT)
+        
+        # Stream the rows, grouping by indication as they arrive
+        rows = session.execute(query).yield_per(200)
+        
+        grouped = {}
+        for r in rows:
+            entry = grouped.get(r.indication)
+            if entry is None:
+                entry = grouped[r.indication] = {
+                    "indication": r.indication,
+                    "therapy_area": r.therapy_area,
+                    "competition_density": r.competition_density or "Medium",
+                    "unmet_need": r.unmet_need or "Medium",
+                    "patient_burden_score": r.patient_burden_score or "N/A",
+                    "active_trials": []
+                }
+            entry["active_trials"].append(Trial(r.phase, r.drug_name, r.sponsor, r.nct_id))
+        
+        # Shared across callers, so hand out immutable sequences
+        for entry in grouped.values():
+            entry["active_trials"] = tuple(entry["active_trials"])
+        return tuple(grouped.values()) or None
 
 
 def _query_database(indication: str = None, therapy_area: str = None, molecule: str = None):
-    """Query clinical trials from database."""
+    """Query clinical trials from database, reusing results for _DATA_CACHE_TTL seconds."""
     try:
-        from src.database.db import get_db_session
-        from src.database.models import ClinicalTrial
-        
-        with get_db_session() as session:
-            query = session.query(ClinicalTrial)
-            
-            if indication:
-                query = query.filter(ClinicalTrial.indication.ilike(f"%{indication}%"))
-            if therapy_area:
-                query = query.filter(ClinicalTrial.therapy_area.ilike(f"%{therapy_area}%"))
-            if molecule:
-                query = query.filter(ClinicalTrial.drug_name.ilike(f"%{molecule}%"))
-            
-            results = query.all()
-            
-            if not results:
-                return None
-            
-            # Group by indication
-            grouped = {}
-            for r in results:
-                ind = r.indication
-                if ind not in grouped:
-                    grouped[ind] = {
-                        "indication": ind,
-                        "therapy_area": r.therapy_area,
-                        "competition_density": r.competition_density or "Medium",
-                        "unmet_need": r.unmet_need or "Medium",
-                        "patient_burden_score": r.patient_burden_score or "N/A",
-                        "active_trials": []
-                    }
-                grouped[ind]["active_trials"].append({
-                    "phase": r.phase,
-                    "drug_name": r.drug_name,
-                    "sponsor": r.sponsor,
-                    "nct_id": r.nct_id
-                })
-            
-            return list(grouped.values())
+        return _fetch_trials(indication, therapy_area, molecule, _ttl_bucket())
     except Exception as e:
         print(f"Database query error: {e}")
         return None
 
 
-def _load_clinical_data() -> list:
+_CLINICAL_JSON_PATH = project_root / "mock_data" / "clinical_trials.json"
+
+
+@lru_cache(maxsize=1)
+def _parse_clinical_json(mtime_ns: int) -> tuple:
+    """Parse the clinical trials JSON file; re-parsed only when its modification time changes."""
+    if ORJSON_AVAILABLE:
+        data = orjson.loads(_CLINICAL_JSON_PATH.read_bytes())
+    else:
+        with open(_CLINICAL_JSON_PATH, "r") as f:
+            data = json.load(f)
+    for entry in data:
+        entry["active_trials"] = tuple(_trial_from_dict(t) for t in entry.get("active_trials", []))
+    return tuple(data)
+
+
+def _load_json_fallback() -> tuple:
+    """Entries of mock_data/clinical_trials.json, or () when the file is missing."""
+    if not _CLINICAL_JSON_PATH.exists():
+        return ()
+    return _parse_clinical_json(_CLINICAL_JSON_PATH.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=1)
+def _load_clinical_snapshot(ttl_bucket: int) -> tuple:
     """Load clinical trials from JSON file, merging with DB if available."""
     all_data = []
     
@@ -130,17 +259,39 @@ def _load_clinical_data() -> list:
         all_data.extend(db_data)
     
     # Always also load JSON file for complete data
-    data_path = Path(__file__).resolve().parent.parent.parent / "mock_data" / "clinical_trials.json"
-    if data_path.exists():
-        with open(data_path, "r") as f:
-            json_data = json.load(f)
-            # Add JSON entries that aren't already in DB data
-            existing_indications = {d.get("indication", "").lower() for d in all_data}
-            for entry in json_data:
-                if entry.get("indication", "").lower() not in existing_indications:
-                    all_data.append(entry)
+    json_data = _load_json_fallback()
+    # Add JSON entries that aren't already in DB data
+    existing_indications = {d.get("indication", "").lower() for d in all_data}
+    for entry in json_data:
+        if entry.get("indication", "").lower() not in existing_indications:
+            all_data.append(entry)
     
-    return all_data
+    return tuple(all_data)
+
+
+def _load_clinical_data() -> tuple:
+    """Merged DB + JSON clinical data, refreshed every _DATA_CACHE_TTL seconds."""
+    return _load_clinical_snapshot(_ttl_bucket())
+
+
+@lru_cache(maxsize=1)
+def _indication_index(ttl_bucket: int) -> tuple:
+    """Lowercased indication names paired with their entries, in load order."""
+    return tuple((entry.get("indication", "").lower(), entry) for entry in _load_clinical_snapshot(ttl_bucket))
+
+
+@lru_cache(maxsize=256)
+def _find_indication_in(needle: str, ttl_bucket: int) -> Optional[dict]:
+    """Return the first entry whose indication contains needle (lowercase)."""
+    for name, entry in _indication_index(ttl_bucket):
+        if needle in name:
+            return entry
+    return None
+
+
+def _find_indication(needle: str) -> Optional[dict]:
+    """Return the first entry whose indication contains needle (lowercase)."""
+    return _find_indication_in(needle, _ttl_bucket())
 
 
 def _fetch_from_clinicaltrials_api(drug_name: str = None, indication: str = None) -> list:
@@ -159,10 +310,10 @@ def _fetch_from_clinicaltrials_api(drug_name: str = None, indication: str = None
         # Group by indication
         grouped = {}
         for trial in trials:
-            ind = trial.indication
-            if ind not in grouped:
-                grouped[ind] = {
-                    "indication": ind,
+            entry = grouped.get(trial.indication)
+            if entry is None:
+                entry = grouped[trial.indication] = {
+                    "indication": trial.indication,
                     "therapy_area": "External Data",
                     "competition_density": "Unknown",
                     "unmet_need": "Unknown",
@@ -170,14 +321,14 @@ def _fetch_from_clinicaltrials_api(drug_name: str = None, indication: str = None
                     "active_trials": [],
                     "source": "clinicaltrials.gov"
                 }
-            grouped[ind]["active_trials"].append({
-                "phase": trial.phase,
-                "drug_name": trial.drug_name,
-                "sponsor": trial.sponsor or "Unknown",
-                "nct_id": trial.nct_id,
-                "status": trial.status,
-                "title": trial.title
-            })
+            entry["active_trials"].append(Trial(
+                phase=trial.phase,
+                drug_name=trial.drug_name,
+                sponsor=trial.sponsor or "Unknown",
+                nct_id=trial.nct_id,
+                status=trial.status,
+                title=trial.title
+            ))
         
         return list(grouped.values())
         
@@ -214,86 +365,107 @@ def query_clinical_trials(indication: Optional[str] = None, molecule: Optional[s
         if indication and therapy_area and indication.lower() == therapy_area.lower():
             therapy_area = None  # Prefer indication over therapy_area
         
-        # Try database first
-        db_results = _query_database(indication, therapy_area, molecule)
-        data = db_results if db_results else _load_clinical_data()
-        
-        results = []
-        
-        for entry in data:
-            # Filter by indication (with null safety)
-            entry_indication = entry.get("indication") or ""
-            if indication and indication.lower() not in entry_indication.lower():
-                continue
-            # Filter by therapy area (with null safety)
-            entry_therapy = entry.get("therapy_area") or ""
-            if therapy_area and therapy_area.lower() not in entry_therapy.lower():
-                continue
-            # Filter by molecule (check in trials)
-            if molecule:
-                molecule_found = False
-                for trial in entry.get("active_trials", []):
-                    drug_name = trial.get("drug_name") or ""
-                    if molecule.lower() in drug_name.lower():
-                        molecule_found = True
-                        break
-                if not molecule_found:
-                    continue
-            
-            results.append(entry)
+        return redis_cache.get_or_set(
+            make_key("tool:clinical_trials", indication, therapy_area, molecule),
+            lambda: _render_clinical_trials(indication, therapy_area, molecule),
+            ttl_seconds=_TOOL_CACHE_TTL
+        )
+    
+    except Exception as e:
+        return f"Error querying clinical trials: {str(e)}"
+
+
+def _fetch_clinical_trials(indication: Optional[str], therapy_area: Optional[str], molecule: Optional[str]) -> list:
+    """Return IndicationReports matching the filters, from the DB or the JSON snapshot."""
+    # Try database first
+    db_results = _query_database(indication, therapy_area, molecule)
+    if db_results:
+        # The WHERE clauses in _query_database already applied every filter
+        return [_indication_report(entry) for entry in db_results]
+    
+    # The DB already came up empty for these filters, so only the JSON
+    # snapshot is left to search. As in the merge, JSON entries for
+    # indications the DB has are superseded by the DB; the unfiltered
+    # query behind that set is shared with _load_clinical_snapshot.
+    db_indications = {(entry.get("indication") or "").lower() for entry in _query_database() or ()}
+    results = []
+    # Lowercase the filter values once rather than per entry
+    indication_lower = indication.lower() if indication else None
+    therapy_lower = therapy_area.lower() if therapy_area else None
+    molecule_lower = molecule.lower() if molecule else None
+    
+    for entry in _load_json_fallback():
+        if (entry.get("indication") or "").lower() in db_indications:
+            continue
+        # Filter by indication (with null safety)
+        if indication_lower and indication_lower not in (entry.get("indication") or "").lower():
+            continue
+        # Filter by therapy area (with null safety)
+        if therapy_lower and therapy_lower not in (entry.get("therapy_area") or "").lower():
+            continue
+        # Filter by molecule (check in trials)
+        if molecule_lower and not any(
+            molecule_lower in (trial.drug_name or "").lower()
+            for trial in entry.get("active_trials", [])
+        ):
+            continue
         
-        if not results:
-            # Try external API as last resort
-            search_term = molecule or indication
-            if search_term:
-                external_data = _fetch_from_clinicaltrials_api(drug_name=molecule, indication=indication)
-                if external_data:
-                    output = [f"**Clinical Trials from ClinicalTrials.gov** *(Real-time data)*\n"]
-                    for r in external_data:
-                        trials = r.get("active_trials", [])
-                        trial_info = f"**{r['indication']}**\n"
-                        trial_info += f"  Active Trials: {len(trials)}\n"
-                        
-                        for trial in trials[:5]:  # Limit to 5 per indication
-                            status = trial.get("status", "Unknown")
-                            trial_info += f"    - [{trial['phase']}] {trial['drug_name']} ({status})\n"
-                            trial_info += f"      Sponsor: {trial['sponsor']} | NCT: {trial['nct_id']}\n"
-                        
-                        output.append(trial_info)
+        results.append(_indication_report(entry))
+    
+    return results
+
+
+def _render_clinical_trials(indication: Optional[str], therapy_area: Optional[str], molecule: Optional[str]) -> str:
+    """Fetch and format clinical trials for already-resolved filters."""
+    results = _fetch_clinical_trials(indication, therapy_area, molecule)
+    
+    if not results:
+        # Try external API as last resort, once both DB and JSON came up empty
+        search_term = molecule or indication
+        if search_term:
+            external_data = _fetch_from_clinicaltrials_api(drug_name=molecule, indication=indication)
+            if external_data:
+                output = [f"**Clinical Trials from ClinicalTrials.gov** *(Real-time data)*\n"]
+                for r in external_data:
+                    trials = r.get("active_trials", [])
+                    trial_info = [
+                        f"**{r['indication']}**\n",
+                        f"  Active Trials: {len(trials)}\n",
+                    ]
                     
-                    output.append("\n---\n*Data fetched in real-time from ClinicalTrials.gov*")
-                    return "\n".join(output)
-            
-            filters = []
-            if indication:
-                filters.append(f"indication='{indication}'")
-            if molecule:
-                filters.append(f"molecule='{molecule}'")
-            if therapy_area:
-                filters.append(f"therapy_area='{therapy_area}'")
-            filter_str = ", ".join(filters) if filters else "the specified criteria"
-            return f"No clinical trials found for {filter_str}. Try: COPD, Asthma, IPF, NSCLC, Melanoma, Diabetes."
-        
-        output = []
-        for r in results:
-            trials = r.get("active_trials", [])
-            competition = r.get("competition_density", "Unknown")
-            unmet_need = r.get("unmet_need", "Unknown")
-            burden = r.get("patient_burden_score", "N/A")
-            
-            trial_info = f"**{r['indication']}** ({r.get('therapy_area', 'N/A')})\n"
-            trial_info += f"  Competition Density: {competition} | Unmet Need: {unmet_need} | Patient Burden: {burden}\n"
-            trial_info += f"  Active Trials: {len(trials)}\n"
-            
-            for trial in trials:
-                trial_info += f"    - [{trial['phase']}] {trial['drug_name']} (Sponsor: {trial['sponsor']}) - {trial['nct_id']}\n"
-            
-            output.append(trial_info)
+                    for trial in trials[:5]:  # Limit to 5 per indication
+                        trial_info.append(f"    - [{trial.phase}] {trial.drug_name} ({trial.status})\n")
+                        trial_info.append(f"      Sponsor: {trial.sponsor} | NCT: {trial.nct_id}\n")
+                    
+                    output.append("".join(trial_info))
+                
+                output.append("\n---\n*Data fetched in real-time from ClinicalTrials.gov*")
+                return "\n".join(output)
         
-        return "\n".join(output)
+        filters = []
+        if indication:
+            filters.append(f"indication='{indication}'")
+        if molecule:
+            filters.append(f"molecule='{molecule}'")
+        if therapy_area:
+            filters.append(f"therapy_area='{therapy_area}'")
+        filter_str = ", ".join(filters) if filters else "the specified criteria"
+        return f"No clinical trials found for {filter_str}. Try: COPD, Asthma, IPF, NSCLC, Melanoma, Diabetes."
     
-    except Exception as e:
-        return f"Error querying clinical trials: {str(e)}"
+    return "\n".join(map(_format_indication_report, results))
+
+
+@lru_cache(maxsize=256)
+def _repurposing_candidates(molecule_lower: str, ttl_bucket: int) -> tuple:
+    """(entry, trial) pairs whose drug matches molecule_lower, most advanced phase first."""
+    pairs = [
+        (entry, trial)
+        for entry in _load_clinical_snapshot(ttl_bucket)
+        for trial in entry.get("active_trials", [])
+        if molecule_lower in (trial.drug_name or "").lower()
+    ]
+    pairs.sort(key=lambda pair: _PHASE_ORDER.get(pair[1].phase, 4))
+    return tuple(pairs)
 
 
 @tool("Find Repurposing Opportunities")
@@ -315,38 +487,21 @@ def find_repurposing_opportunities(molecule: str = None, query: Optional[str] =
         if not molecule:
             molecule = query or "unspecified molecule"
         
-        data = _load_clinical_data()
-        opportunities = []
-        
-        for entry in data:
-            for trial in entry.get("active_trials", []):
-                if molecule.lower() in trial.get("drug_name", "").lower():
-                    opportunities.append({
-                        "indication": entry["indication"],
-                        "therapy_area": entry.get("therapy_area", "N/A"),
-                        "phase": trial["phase"],
-                        "sponsor": trial["sponsor"],
-                        "nct_id": trial["nct_id"],
-                        "competition": entry.get("competition_density", "Unknown"),
-                        "unmet_need": entry.get("unmet_need", "Unknown")
-                    })
+        opportunities = _repurposing_candidates(molecule.lower(), _ttl_bucket())
         
         if not opportunities:
             return f"No repurposing opportunities found for {molecule} in clinical trials."
         
         output = [f"**Repurposing Opportunities for {molecule}:**\n"]
         
-        # Sort by phase (later phases = more advanced)
-        phase_order = {"Phase IV": 0, "Phase III": 1, "Phase II": 2, "Phase I": 3}
-        opportunities.sort(key=lambda x: phase_order.get(x["phase"], 4))
-        
-        for opp in opportunities:
-            potential = "HIGH" if opp["phase"] in ["Phase III", "Phase IV"] and opp["competition"] == "Low" else "MEDIUM"
+        for entry, trial in opportunities:
+            competition = entry.get("competition_density", "Unknown")
+            potential = "HIGH" if trial.phase in _LATE_PHASES and competition == "Low" else "MEDIUM"
             
             output.append(
-                f"- **{opp['indication']}** ({opp['therapy_area']})\n"
-                f"  Phase: {opp['phase']} | Sponsor: {opp['sponsor']}\n"
-                f"  Competition: {opp['competition']} | Unmet Need: {opp['unmet_need']}\n"
+                f"- **{entry['indication']}** ({entry.get('therapy_area', 'N/A')})\n"
+                f"  Phase: {trial.phase} | Sponsor: {trial.sponsor}\n"
+                f"  Competition: {competition} | Unmet Need: {entry.get('unmet_need', 'Unknown')}\n"
                 f"  **Repurposing Potential: {potential}**\n"
             )
         
@@ -368,13 +523,7 @@ def analyze_competition_density(indication: str) -> str:
         Competition analysis with trial counts and recommendations.
     """
     try:
-        data = _load_clinical_data()
-        
-        result = None
-        for entry in data:
-            if indication.lower() in entry.get("indication", "").lower():
-                result = entry
-                break
+        result = _find_indication(indication.lower())
         
         if not result:
             return f"No data found for indication: {indication}"
@@ -385,14 +534,10 @@ def analyze_competition_density(indication: str) -> str:
         burden = result.get("patient_burden_score", "N/A")
         
         # Count trials by phase
-        phase_counts = {}
-        sponsors = set()
-        for trial in trials:
-            phase = trial["phase"]
-            phase_counts[phase] = phase_counts.get(phase, 0) + 1
-            sponsors.add(trial["sponsor"])
+        phase_counts = Counter(trial.phase for trial in trials)
+        sponsors = {trial.sponsor for trial in trials}
         
-        output = (
+        output = [
             f"**Competition Analysis for {result['indication']}:**\n\n"
             f"**Overall Competition:** {competition}\n"
             f"**Unmet Need:** {unmet_need}\n"
@@ -400,23 +545,21 @@ def analyze_competition_density(indication: str) -> str:
             f"**Trial Landscape:**\n"
             f"  - Total Active Trials: {len(trials)}\n"
             f"  - Unique Sponsors: {len(sponsors)}\n"
-        )
-        
-        for phase, count in sorted(phase_counts.items()):
-            output += f"  - {phase}: {count} trial(s)\n"
+        ]
+        output.extend(f"  - {phase}: {count} trial(s)\n" for phase, count in sorted(phase_counts.items()))
         
         # Recommendation
-        output += "\n**Strategic Recommendation:**\n"
-        if competition == "Low" and unmet_need in ["High", "Very High"]:
-            output += "  ✅ **HIGH OPPORTUNITY** - Low competition with significant unmet need\n"
+        output.append("\n**Strategic Recommendation:**\n")
+        if competition == "Low" and unmet_need in _HIGH_UNMET_NEED:
+            output.append("  ✅ **HIGH OPPORTUNITY** - Low competition with significant unmet need\n")
         elif competition == "Low":
-            output += "  ✅ Favorable competitive landscape for entry\n"
+            output.append("  ✅ Favorable competitive landscape for entry\n")
         elif competition == "High":
-            output += "  ⚠️ Crowded space - differentiation required\n"
+            output.append("  ⚠️ Crowded space - differentiation required\n")
         else:
-            output += "  ℹ️ Moderate competition - targeted strategy needed\n"
+            output.append("  ℹ️ Moderate competition - targeted strategy needed\n")
         
-        return output
+        return "".join(output)
     
     except Exception as e:
         return f"Error analyzing competition: {str(e)}"
@@ -3,97 +3,176 @@ EXIM Trade Data Tool
 Queries database for import/export supply chain analysis.
 """
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from crewai.tools import tool
 from pathlib import Path
 from typing import Optional
-import sys
 
-# Add project root to path
-project_root = Path(__file__).resolve().parent.parent.parent
-sys.path.insert(0, str(project_root))
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
+from ..config.settings import settings
+from ._entity_index import best_match, build_matcher, match_drug_suffix
 
+
+# Brand names are checked before molecule names
+_BRAND_TO_MOLECULE = {
+    "dolo": "Paracetamol", "dolo650": "Paracetamol", "dolo 650": "Paracetamol",
+    "calpol": "Paracetamol", "tylenol": "Paracetamol",
+    "ozempic": "Semaglutide", "wegovy": "Semaglutide",
+    "humira": "Adalimumab", "pan40": "Pantoprazole", "pan 40": "Pantoprazole",
+    "azithral": "Azithromycin", "xarelto": "Rivaroxaban"
+}
+
+_KNOWN_MOLECULES = (
+    "sitagliptin", "rivaroxaban", "pirfenidone", "roflumilast",
+    "metformin", "atorvastatin", "omeprazole", "amlodipine",
+    "paracetamol", "azithromycin", "pantoprazole", "semaglutide",
+    "adalimumab", "escitalopram", "montelukast", "trastuzumab",
+    "lenalidomide", "pembrolizumab", "tiotropium", "fluticasone", "omalizumab"
+)
+
+_MOLECULE_MATCHER = build_matcher({
+    **_BRAND_TO_MOLECULE,
+    **{mol: mol.capitalize() for mol in _KNOWN_MOLECULES},
+})
+
+
+@lru_cache(maxsize=4096)
 def _extract_molecule_from_query(query: str) -> str:
     """Extract molecule name from natural language query."""
     if not query:
         return None
     
     query_lower = query.lower()
-    
-    # Check brand names first
-    brand_to_molecule = {
-        "dolo": "Paracetamol", "dolo650": "Paracetamol", "dolo 650": "Paracetamol",
-        "calpol": "Paracetamol", "tylenol": "Paracetamol",
-        "ozempic": "Semaglutide", "wegovy": "Semaglutide",
-        "humira": "Adalimumab", "pan40": "Pantoprazole", "pan 40": "Pantoprazole",
-        "azithral": "Azithromycin", "xarelto": "Rivaroxaban"
-    }
-    for brand, mol in brand_to_molecule.items():
-        if brand in query_lower:
-            return mol
-    
-    known_molecules = [
-        "sitagliptin", "rivaroxaban", "pirfenidone", "roflumilast",
-        "metformin", "atorvastatin", "omeprazole", "amlodipine",
-        "paracetamol", "azithromycin", "pantoprazole", "semaglutide",
-        "adalimumab", "escitalopram", "montelukast", "trastuzumab",
-        "lenalidomide", "pembrolizumab", "tiotropium", "fluticasone", "omalizumab"
-    ]
-    
-    for mol in known_molecules:
-        if mol in query_lower:
-            return mol.capitalize()
+    molecule = best_match(_MOLECULE_MATCHER, query_lower)
+    if molecule:
+        return molecule
     
     # Try drug name suffixes
-    words = query.replace(",", " ").replace(".", " ").split()
-    drug_suffixes = ["mab", "nib", "lib", "vir", "stat", "pril", "olol", 
-                     "sartan", "pine", "azole", "mycin", "cillin", "done",
-                     "prazole", "gliptin", "formin", "xaban"]
-    
-    for word in words:
-        word_clean = word.lower().strip()
-        for suffix in drug_suffixes:
-            if word_clean.endswith(suffix) and len(word_clean) > len(suffix) + 2:
-                return word_clean.capitalize()
-    
-    return None
+    return match_drug_suffix(query_lower)
+
+
+def _with_lookup_keys(entries: list) -> list:
+    """Precompute the lowercased molecule name and source-country set used by the tools."""
+    for entry in entries:
+        entry["_molecule_lc"] = (entry.get("molecule") or "").lower()
+        entry["_countries_set"] = frozenset(entry.get("major_source_countries") or ())
+    return entries
 
 
 def _query_database(molecule: str = None):
     """Query trade data from database."""
     try:
-        from src.database.db import get_db_session
-        from src.database.models import TradeData
+        from sqlalchemy import select
+        from ..database.db import get_db_session
+        from ..database.models import TradeData
         
         with get_db_session() as session:
-            query = session.query(TradeData)
+            # Only the columns we render, as plain rows rather than ORM entities
+            query = select(
+                TradeData.molecule, TradeData.total_import_volume_kg,
+                TradeData.average_price_per_kg, TradeData.major_source_countries
+            )
             
             if molecule:
-                query = query.filter(TradeData.molecule.ilike(f"%{molecule}%"))
+                query = query.where(TradeData.molecule.icontains(molecule, autoescape=True))
             
-            results = query.all()
-            
-            if not results:
-                return None
-            
-            return [{
+            # Stream rows in batches rather than buffering the whole result
+            rows = session.execute(query).yield_per(500)
+            results = _with_lookup_keys([{
                 "molecule": r.molecule,
                 "total_import_volume_kg": r.total_import_volume_kg or 0,
                 "average_price_per_kg": r.average_price_per_kg or 0,
                 "major_source_countries": r.major_source_countries if r.major_source_countries else []
-            } for r in results]
+            } for r in rows])
+            
+            return results or None
     except Exception as e:
         print(f"Database query error: {e}")
         return None
 
 
-def _load_exim_data() -> list:
+# Response layouts for the EXIM tools, filled with str.format_map
+_EXIM_TEMPLATE = (
+    "**EXIM Trade Data for {molecule}:**\n\n"
+    "📦 **Import Volume:** {volume:,} kg\n"
+    "💰 **Average Price:** ${price:,.2f}/kg\n"
+    "💵 **Estimated Total Value:** ${total_value:,.0f}\n\n"
+    "🌍 **Major Source Countries:**\n"
+    "{countries}"
+    "{insight}"
+)
+
+_SUPPLY_CHAIN_TEMPLATE = (
+    "**Supply Chain Analysis for {molecule}:**\n\n"
+    "**Concentration Risk:** {concentration_risk}\n"
+    "  {risk_desc}\n\n"
+    "**Source Countries:** {countries}\n"
+    "{china_alert}"
+    "\n**Pricing Analysis:**\n"
+    "  - Current Price: ${price:,.2f}/kg\n"
+    "  - Annual Import Value: ${annual_value:,.0f}\n"
+    "\n**Recommendations:**\n"
+    "{recommendations}"
+)
+
+# Workers for running the IQVIA and EXIM lookups of gather_molecule_intel side by side
+_INTEL_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="molecule-intel")
+
+# Seconds the parsed JSON trade data is reused before the file is re-read
+_DATA_CACHE_TTL = settings.PHARMA_TOOLS_CACHE_TTL
+
+
+def _ttl_bucket() -> int:
+    """Current cache generation; advances every _DATA_CACHE_TTL seconds."""
+    return int(time.monotonic() // _DATA_CACHE_TTL)
+
+
+def _load_exim_data() -> tuple:
+    """Return the JSON trade data, re-read at most once per _DATA_CACHE_TTL."""
+    return _load_exim_snapshot(_ttl_bucket())
+
+
+@lru_cache(maxsize=1)
+def _load_exim_snapshot(ttl_bucket: int) -> tuple:
     """Load EXIM data from JSON file."""
     data_path = Path(__file__).resolve().parent.parent.parent / "mock_data" / "exim_trade_data.json"
-    if data_path.exists():
+    if not data_path.exists():
+        return ()
+    if ORJSON_AVAILABLE:
+        data = orjson.loads(data_path.read_bytes())
+    else:
         with open(data_path, "r") as f:
-            return json.load(f)
-    return []
+            data = json.load(f)
+    return tuple(_with_lookup_keys(data))
+
+
+@lru_cache(maxsize=1)
+def _exim_molecule_index(ttl_bucket: int) -> dict:
+    """Exact lowercased molecule name -> first JSON entry whose molecule contains it."""
+    entries = _load_exim_snapshot(ttl_bucket)
+    index = {}
+    for entry in entries:
+        key = entry["_molecule_lc"]
+        if key not in index:
+            index[key] = next(e for e in entries if key in e["_molecule_lc"])
+    return index
+
+
+def _find_exim_entry(molecule_lc: str) -> Optional[dict]:
+    """Return the first JSON trade entry whose molecule contains molecule_lc."""
+    ttl_bucket = _ttl_bucket()
+    entry = _exim_molecule_index(ttl_bucket).get(molecule_lc)
+    if entry is not None:
+        return entry
+    # Not an exact molecule name - fall back to the substring scan
+    return next((e for e in _load_exim_snapshot(ttl_bucket) if molecule_lc in e["_molecule_lc"]), None)
 
 
 @tool("Query EXIM Trade Data")
@@ -116,6 +195,8 @@ def query_exim_trade(molecule: str = None, query: Optional[str] = None) -> str:
         if not molecule:
             molecule = query or "unspecified molecule"
         
+        molecule_lc = molecule.lower()
+        
         # First try database
         db_data = _query_database(molecule)
         
@@ -124,17 +205,13 @@ def query_exim_trade(molecule: str = None, query: Optional[str] = None) -> str:
         # If database has results for this molecule, use them
         if db_data:
             for entry in db_data:
-                if molecule.lower() in entry.get("molecule", "").lower():
+                if molecule_lc in entry["_molecule_lc"]:
                     result = entry
                     break
         
         # If not found in DB, search JSON file
         if not result:
-            json_data = _load_exim_data()
-            for entry in json_data:
-                if molecule.lower() in entry.get("molecule", "").lower():
-                    result = entry
-                    break
+            result = _find_exim_entry(molecule_lc)
         
         if not result:
             return f"No EXIM trade data found for molecule: {molecule}. This API may not be in our database."
@@ -142,24 +219,22 @@ def query_exim_trade(molecule: str = None, query: Optional[str] = None) -> str:
         # Calculate total value
         total_value = result["total_import_volume_kg"] * result["average_price_per_kg"]
         
-        output = (
-            f"**EXIM Trade Data for {result['molecule']}:**\n\n"
-            f"📦 **Import Volume:** {result['total_import_volume_kg']:,} kg\n"
-            f"💰 **Average Price:** ${result['average_price_per_kg']:,.2f}/kg\n"
-            f"💵 **Estimated Total Value:** ${total_value:,.0f}\n\n"
-            f"🌍 **Major Source Countries:**\n"
-        )
-        
-        for country in result["major_source_countries"]:
-            output += f"  - {country}\n"
-        
         # Add supply chain insights
         if result["average_price_per_kg"] > 10000:
-            output += "\n⚠️ **High-value API** - Likely biologic or specialty drug"
+            insight = "\n⚠️ **High-value API** - Likely biologic or specialty drug"
         elif result["average_price_per_kg"] < 500:
-            output += "\n✅ **Commodity API** - Multiple suppliers available"
+            insight = "\n✅ **Commodity API** - Multiple suppliers available"
+        else:
+            insight = ""
         
-        return output
+        return _EXIM_TEMPLATE.format_map({
+            "molecule": result["molecule"],
+            "volume": result["total_import_volume_kg"],
+            "price": result["average_price_per_kg"],
+            "total_value": total_value,
+            "countries": "".join(f"  - {country}\n" for country in result["major_source_countries"]),
+            "insight": insight,
+        })
     
     except Exception as e:
         return f"Error querying EXIM data: {str(e)}"
@@ -184,14 +259,13 @@ def analyze_supply_chain(molecule: str = None, query: Optional[str] = None) -> s
         if not molecule:
             molecule = query or "unspecified molecule"
         
+        molecule_lc = molecule.lower()
         db_data = _query_database(molecule)
-        data = db_data if db_data else _load_exim_data()
         
-        result = None
-        for entry in data:
-            if molecule.lower() in entry.get("molecule", "").lower():
-                result = entry
-                break
+        if db_data:
+            result = next((entry for entry in db_data if molecule_lc in entry["_molecule_lc"]), None)
+        else:
+            result = _find_exim_entry(molecule_lc)
         
         if not result:
             return f"No supply chain data found for: {molecule}"
@@ -212,34 +286,58 @@ def analyze_supply_chain(molecule: str = None, query: Optional[str] = None) -> s
             risk_desc = "Multiple source countries - diversified supply"
         
         # China dependency check
-        china_dependent = "China" in countries
-        
-        output = (
-            f"**Supply Chain Analysis for {result['molecule']}:**\n\n"
-            f"**Concentration Risk:** {concentration_risk}\n"
-            f"  {risk_desc}\n\n"
-            f"**Source Countries:** {', '.join(countries)}\n"
-        )
-        
-        if china_dependent:
-            output += "⚠️ **China Dependency Alert:** Consider alternate sourcing\n"
-        
-        output += (
-            f"\n**Pricing Analysis:**\n"
-            f"  - Current Price: ${price:,.2f}/kg\n"
-            f"  - Annual Import Value: ${price * volume:,.0f}\n"
-        )
+        china_dependent = "China" in result["_countries_set"]
         
         # Recommendations
-        output += "\n**Recommendations:**\n"
+        recommendations = []
         if concentration_risk == "HIGH":
-            output += "  - Qualify additional suppliers from alternate regions\n"
+            recommendations.append("  - Qualify additional suppliers from alternate regions\n")
         if china_dependent:
-            output += "  - Explore India or European API manufacturers\n"
+            recommendations.append("  - Explore India or European API manufacturers\n")
         if price > 50000:
-            output += "  - Consider backward integration for cost control\n"
+            recommendations.append("  - Consider backward integration for cost control\n")
         
-        return output
+        return _SUPPLY_CHAIN_TEMPLATE.format_map({
+            "molecule": result["molecule"],
+            "concentration_risk": concentration_risk,
+            "risk_desc": risk_desc,
+            "countries": ", ".join(countries),
+            "china_alert": "⚠️ **China Dependency Alert:** Consider alternate sourcing\n" if china_dependent else "",
+            "price": price,
+            "annual_value": price * volume,
+            "recommendations": "".join(recommendations),
+        })
     
     except Exception as e:
         return f"Error analyzing supply chain: {str(e)}"
+
+
+@tool("Gather Molecule Intelligence")
+def gather_molecule_intel(molecule: str = None, query: Optional[str] = None) -> str:
+    """
+    Fetch IQVIA market data and EXIM trade data for a molecule in one call.
+    
+    Args:
+        molecule: Name of the molecule to look up.
+        query: Natural language query to extract molecule from.
+    
+    Returns:
+        Market data followed by import/export trade data for the molecule.
+    """
+    try:
+        from .iqvia_tool import query_iqvia_market
+        
+        if not molecule and query:
+            molecule = _extract_molecule_from_query(query)
+        
+        if not molecule:
+            molecule = query or "unspecified molecule"
+        
+        # Both lookups are I/O bound, so run them concurrently
+        market = _INTEL_EXECUTOR.submit(query_iqvia_market._run, molecule=molecule)
+        trade = _INTEL_EXECUTOR.submit(query_exim_trade._run, molecule=molecule)
+        
+        return f"{market.result()}\n\n---\n\n{trade.result()}"
+    
+    except Exception as e:
+        return f"Error gathering molecule intelligence: {str(e)}"
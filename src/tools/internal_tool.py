@@ -3,18 +3,100 @@ Internal Knowledge Tool
 RAG-based search over internal documents using ChromaDB.
 """
 import json
-from typing import Optional
+from functools import lru_cache
+from typing import NamedTuple, Optional
 from crewai.tools import tool
 from pathlib import Path
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
+
+class IndexedDoc(NamedTuple):
+    """An internal document with its searchable fields lowercased once."""
+    doc: dict
+    title_lc: str
+    summary_lc: str
+    content_lc: str
+    tags_lc: tuple
+
+
+@lru_cache(maxsize=1)
 def _load_internal_docs() -> list:
-    """Load internal documents mock data from JSON file."""
+    """Load internal documents mock data from JSON file (parsed once per process)."""
     data_path = Path(__file__).resolve().parent.parent.parent / "mock_data" / "internal_docs_metadata.json"
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data_path.read_bytes())
     with open(data_path, "r") as f:
         return json.load(f)
 
 
+@lru_cache(maxsize=1)
+def _get_docs_index() -> tuple:
+    """IndexedDoc entries for every internal document, in file order."""
+    return tuple(
+        IndexedDoc(
+            doc,
+            doc.get("title", "").lower(),
+            doc.get("summary", "").lower(),
+            doc.get("content", "").lower(),
+            tuple(tag.lower() for tag in doc.get("tags", []))
+        )
+        for doc in _load_internal_docs()
+    )
+
+
+@lru_cache(maxsize=1)
+def _docs_by_id() -> dict:
+    """Uppercased doc_id -> document, keeping the first document for each ID."""
+    by_id = {}
+    for entry in _get_docs_index():
+        by_id.setdefault(entry.doc.get("doc_id", "").upper(), entry.doc)
+    return by_id
+
+
+@lru_cache(maxsize=1)
+def _docs_by_tag() -> dict:
+    """Lowercased tag -> documents carrying it, in file order."""
+    by_tag = {}
+    for entry in _get_docs_index():
+        # A document lists each tag once even if the JSON repeats it
+        for tag_lc in dict.fromkeys(entry.tags_lc):
+            by_tag.setdefault(tag_lc, []).append(entry.doc)
+    return by_tag
+
+
+@lru_cache(maxsize=4096)
+def _phrase_scores(phrase: str) -> tuple:
+    """Per-document score for the whole query appearing in title (3), summary (2) and content (2)."""
+    return tuple(
+        3 * (phrase in entry.title_lc) + 2 * (phrase in entry.summary_lc) + 2 * (phrase in entry.content_lc)
+        for entry in _get_docs_index()
+    )
+
+
+@lru_cache(maxsize=4096)
+def _keyword_scores(word: str) -> tuple:
+    """Per-document count of fields (title, summary, content) containing word."""
+    return tuple(
+        (word in entry.title_lc) + (word in entry.summary_lc) + (word in entry.content_lc)
+        for entry in _get_docs_index()
+    )
+
+
+def _invalidate() -> None:
+    """Drop the cached documents so the next call re-reads the JSON file."""
+    _load_internal_docs.cache_clear()
+    _get_docs_index.cache_clear()
+    _docs_by_id.cache_clear()
+    _docs_by_tag.cache_clear()
+    _phrase_scores.cache_clear()
+    _keyword_scores.cache_clear()
+
+
 @tool("Search Internal Documents")
 def search_internal_docs(query: str, tags: Optional[list] = None) -> str:
     """
@@ -28,42 +110,28 @@ def search_internal_docs(query: str, tags: Optional[list] = None) -> str:
         Matching documents with summaries and relevant content.
     """
     try:
-        docs = _load_internal_docs()
         results = []
         query_lower = query.lower()
+        # Substring hits per term are cached, so repeated terms cost one lookup
+        phrase_scores = _phrase_scores(query_lower)
+        # Only longer query words count towards keyword matches
+        keyword_scores = [_keyword_scores(word) for word in query_lower.split() if len(word) > 3]
         
-        for doc in docs:
-            score = 0
-            
-            # Check title match
-            if query_lower in doc.get("title", "").lower():
-                score += 3
-            
-            # Check summary match
-            if query_lower in doc.get("summary", "").lower():
-                score += 2
-            
-            # Check content match
-            if query_lower in doc.get("content", "").lower():
-                score += 2
+        for i, entry in enumerate(_get_docs_index()):
+            doc = entry.doc
+            # Title, summary and content matches
+            score = phrase_scores[i]
             
             # Check tag match
-            for tag in doc.get("tags", []):
-                if query_lower in tag.lower():
+            for tag, tag_lc in zip(doc.get("tags", []), entry.tags_lc):
+                if query_lower in tag_lc:
                     score += 1
                 if tags and tag in tags:
                     score += 2
             
             # Check for keyword matches
-            query_words = query_lower.split()
-            for word in query_words:
-                if len(word) > 3:  # Skip short words
-                    if word in doc.get("title", "").lower():
-                        score += 1
-                    if word in doc.get("summary", "").lower():
-                        score += 1
-                    if word in doc.get("content", "").lower():
-                        score += 1
+            for scores in keyword_scores:
+                score += scores[i]
             
             if score > 0:
                 results.append((score, doc))
@@ -105,20 +173,19 @@ def get_document_by_id(doc_id: str) -> str:
         Full document content.
     """
     try:
-        docs = _load_internal_docs()
+        doc = _docs_by_id().get(doc_id.upper())
         
-        for doc in docs:
-            if doc.get("doc_id", "").upper() == doc_id.upper():
-                output = (
-                    f"**{doc['title']}** ({doc['doc_id']})\n\n"
-                    f"**Tags:** {', '.join(doc['tags'])}\n\n"
-                    f"**Summary:**\n{doc['summary']}\n\n"
-                )
-                if doc.get("content"):
-                    output += f"**Full Content:**\n{doc['content']}"
-                return output
+        if doc is None:
+            return f"Document not found: {doc_id}"
         
-        return f"Document not found: {doc_id}"
+        output = (
+            f"**{doc['title']}** ({doc['doc_id']})\n\n"
+            f"**Tags:** {', '.join(doc['tags'])}\n\n"
+            f"**Summary:**\n{doc['summary']}\n\n"
+        )
+        if doc.get("content"):
+            output += f"**Full Content:**\n{doc['content']}"
+        return output
     
     except Exception as e:
         return f"Error retrieving document: {str(e)}"
@@ -136,12 +203,7 @@ def list_documents_by_tag(tag: str) -> str:
         List of matching documents.
     """
     try:
-        docs = _load_internal_docs()
-        
-        matching = []
-        for doc in docs:
-            if tag.lower() in [t.lower() for t in doc.get("tags", [])]:
-                matching.append(doc)
+        matching = _docs_by_tag().get(tag.lower())
         
         if not matching:
             return f"No documents found with tag: {tag}"
@@ -3,125 +3,239 @@ IQVIA Market Data Tool
 Queries market data from database for molecule/region analysis.
 """
 import json
+import time
+from functools import lru_cache
 from typing import Optional, List
 from crewai.tools import tool
 from pathlib import Path
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
+from ..config.settings import settings
+from ..infra.cache import make_key, redis_cache
+from ._entity_index import best_match, build_matcher, flatten_keywords
+
+
+# Keyword lists per canonical entity, in priority order
+_THERAPY_AREAS = {
+    "respiratory": ["respiratory", "copd", "asthma", "lung", "pulmonary", "inhaler"],
+    "oncology": ["oncology", "cancer", "tumor", "carcinoma", "melanoma", "leukemia"],
+    "diabetes": ["diabetes", "diabetic", "glucose", "insulin", "metformin", "gliptin", "obesity", "weight"],
+    "cardiovascular": ["cardiac", "cardio", "heart", "cardiovascular", "hypertension", "blood pressure", "cholesterol"],
+    "cns": ["neuro", "brain", "alzheimer", "parkinson", "epilepsy", "depression", "anxiety", "mental", "psychiatric"],
+    "autoimmune": ["immune", "autoimmune", "rheumatoid", "psoriasis", "crohn", "arthritis"],
+    "analgesic": ["pain", "analgesic", "fever", "headache", "paracetamol", "dolo"],
+    "gastrointestinal": ["gerd", "acid", "reflux", "gastro", "ulcer", "gi", "stomach"],
+    "anti-infective": ["antibiotic", "infection", "bacterial", "azithromycin"]
+}
+
+_REGIONS = {
+    "india": ["india", "indian"],
+    "us": ["us", "usa", "united states", "america"],
+    "europe": ["europe", "eu", "european"],
+    "global": ["global", "worldwide", "world"]
+}
+
+_KNOWN_MOLECULES = (
+    "pembrolizumab", "sitagliptin", "rivaroxaban", "pirfenidone",
+    "roflumilast", "tiotropium", "omalizumab", "fluticasone",
+    "paracetamol", "azithromycin", "pantoprazole", "atorvastatin",
+    "metformin", "semaglutide", "adalimumab", "escitalopram",
+    "montelukast", "trastuzumab", "lenalidomide", "amlodipine"
+)
+
+# Brand names are checked before molecule names
+_BRAND_TO_MOLECULE = {
+    "dolo": "Paracetamol", "dolo650": "Paracetamol", "dolo 650": "Paracetamol",
+    "calpol": "Paracetamol", "crocin": "Paracetamol", "tylenol": "Paracetamol",
+    "januvia": "Sitagliptin", "xarelto": "Rivaroxaban",
+    "keytruda": "Pembrolizumab", "opdivo": "Nivolumab",
+    "ozempic": "Semaglutide", "wegovy": "Semaglutide",
+    "humira": "Adalimumab", "pan": "Pantoprazole", "pan40": "Pantoprazole", "pan 40": "Pantoprazole",
+    "lipitor": "Atorvastatin", "azithral": "Azithromycin",
+    "nexito": "Escitalopram", "lexapro": "Escitalopram",
+    "herceptin": "Trastuzumab", "revlimid": "Lenalidomide",
+    "norvasc": "Amlodipine", "singulair": "Montelukast", "montair": "Montelukast"
+}
+
+_ENTITY_MATCHERS = {
+    "therapy_area": build_matcher(flatten_keywords(
+        _THERAPY_AREAS, lambda area: area.capitalize() if area not in ["cns", "gi"] else area.upper()
+    )),
+    "region": build_matcher(flatten_keywords(
+        _REGIONS, lambda region: region.upper() if region == "us" else region.capitalize()
+    )),
+    "molecule": build_matcher({
+        **_BRAND_TO_MOLECULE,
+        **{mol: mol.capitalize() for mol in _KNOWN_MOLECULES},
+    }),
+}
+
+
+@lru_cache(maxsize=4096)
 def _extract_entity_from_query(query: str, entity_type: str = "molecule") -> str:
     """Extract entities from a natural language query."""
     if not query:
         return None
     
+    matcher = _ENTITY_MATCHERS.get(entity_type)
+    if matcher is None:
+        return None
+    return best_match(matcher, query.lower())
+
+
+@lru_cache(maxsize=4096)
+def _extract_entities(query: str, entity_types: tuple) -> dict:
+    """Extract several entity types from a query, lowercasing it only once."""
     query_lower = query.lower()
+    return {
+        entity_type: best_match(_ENTITY_MATCHERS[entity_type], query_lower)
+        for entity_type in entity_types
+    }
+
+
+def _market_record(r) -> dict:
+    """Convert a MarketData row into the dict shape used by the JSON data."""
+    return {
+        "molecule": r.molecule,
+        "region": r.region,
+        "therapy_area": r.therapy_area,
+        "indication": r.indication,
+        "market_size_usd_mn": r.market_size_usd_mn,
+        "cagr_percent": r.cagr_percent,
+        "top_competitors": r.top_competitors or [],
+        "generic_penetration": r.generic_penetration,
+        "patient_burden": r.patient_burden,
+        "competition_level": r.competition_level
+    }
+
+
+def _fetch_market_rows(molecule: str = None, region: str = None, therapy_area: str = None) -> list:
+    """Select market data rows, applying any filters as case-insensitive WHERE clauses."""
+    from sqlalchemy import select
+    from ..database.db import get_db_session
+    from ..database.models import MarketData
     
-    if entity_type == "therapy_area":
-        therapy_areas = {
-            "respiratory": ["respiratory", "copd", "asthma", "lung", "pulmonary", "inhaler"],
-            "oncology": ["oncology", "cancer", "tumor", "carcinoma", "melanoma", "leukemia"],
-            "diabetes": ["diabetes", "diabetic", "glucose", "insulin", "metformin", "gliptin", "obesity", "weight"],
-            "cardiovascular": ["cardiac", "cardio", "heart", "cardiovascular", "hypertension", "blood pressure", "cholesterol"],
-            "cns": ["neuro", "brain", "alzheimer", "parkinson", "epilepsy", "depression", "anxiety", "mental", "psychiatric"],
-            "autoimmune": ["immune", "autoimmune", "rheumatoid", "psoriasis", "crohn", "arthritis"],
-            "analgesic": ["pain", "analgesic", "fever", "headache", "paracetamol", "dolo"],
-            "gastrointestinal": ["gerd", "acid", "reflux", "gastro", "ulcer", "gi", "stomach"],
-            "anti-infective": ["antibiotic", "infection", "bacterial", "azithromycin"]
-        }
+    with get_db_session() as db:
+        # Only the columns we render, as plain rows rather than ORM entities
+        query = select(
+            MarketData.molecule, MarketData.region, MarketData.therapy_area,
+            MarketData.indication, MarketData.market_size_usd_mn, MarketData.cagr_percent,
+            MarketData.top_competitors, MarketData.generic_penetration,
+            MarketData.patient_burden, MarketData.competition_level
+        )
         
-        for area, keywords in therapy_areas.items():
-            for keyword in keywords:
-                if keyword in query_lower:
-                    return area.capitalize() if area not in ["cns", "gi"] else area.upper()
-        return None
-    
-    elif entity_type == "region":
-        regions = {
-            "india": ["india", "indian"],
-            "us": ["us", "usa", "united states", "america"],
-            "europe": ["europe", "eu", "european"],
-            "global": ["global", "worldwide", "world"]
-        }
+        if molecule:
+            query = query.where(MarketData.molecule.icontains(molecule, autoescape=True))
+        if region:
+            query = query.where(MarketData.region.icontains(region, autoescape=True))
+        if therapy_area:
+            query = query.where(MarketData.therapy_area.icontains(therapy_area, autoescape=True))
         
-        for region, keywords in regions.items():
-            for keyword in keywords:
-                if keyword in query_lower:
-                    return region.upper() if region == "us" else region.capitalize()
+        # Stream rows in batches rather than buffering the whole result
+        return [_market_record(r) for r in db.execute(query).yield_per(500)]
+
+
+def _query_iqvia(molecule: str = None, region: str = None, therapy_area: str = None):
+    """Query market data from the database with filters pushed down; None if unavailable or empty."""
+    try:
+        return _fetch_market_rows(molecule, region, therapy_area) or None
+    except Exception:
         return None
-    
-    elif entity_type == "molecule":
-        known_molecules = [
-            "pembrolizumab", "sitagliptin", "rivaroxaban", "pirfenidone",
-            "roflumilast", "tiotropium", "omalizumab", "fluticasone",
-            "paracetamol", "azithromycin", "pantoprazole", "atorvastatin",
-            "metformin", "semaglutide", "adalimumab", "escitalopram",
-            "montelukast", "trastuzumab", "lenalidomide", "amlodipine"
-        ]
-        
-        # Also check brand names
-        brand_to_molecule = {
-            "dolo": "Paracetamol", "dolo650": "Paracetamol", "dolo 650": "Paracetamol",
-            "calpol": "Paracetamol", "crocin": "Paracetamol", "tylenol": "Paracetamol",
-            "januvia": "Sitagliptin", "xarelto": "Rivaroxaban",
-            "keytruda": "Pembrolizumab", "opdivo": "Nivolumab",
-            "ozempic": "Semaglutide", "wegovy": "Semaglutide",
-            "humira": "Adalimumab", "pan": "Pantoprazole", "pan40": "Pantoprazole", "pan 40": "Pantoprazole",
-            "lipitor": "Atorvastatin", "azithral": "Azithromycin",
-            "nexito": "Escitalopram", "lexapro": "Escitalopram",
-            "herceptin": "Trastuzumab", "revlimid": "Lenalidomide",
-            "norvasc": "Amlodipine", "singulair": "Montelukast", "montair": "Montelukast"
-        }
-        
-        for brand, mol in brand_to_molecule.items():
-            if brand in query_lower:
-                return mol
-        
-        for mol in known_molecules:
-            if mol in query_lower:
-                return mol.capitalize()
-    
-    return None
 
 
-def _load_iqvia_data() -> list:
+_IQVIA_JSON_PATH = Path(__file__).resolve().parent.parent.parent / "mock_data" / "iqvia_market_data.json"
+
+# Layout of one market entry in the query_iqvia_market response
+_IQVIA_ENTRY_TEMPLATE = (
+    "**{molecule}** ({region}):\n"
+    "  - Therapy Area: {therapy_area}\n"
+    "  - Market Size: ${market_size}M USD\n"
+    "  - CAGR: {cagr}%\n"
+    "  - Top Competitors: {competitors}\n"
+    "  - Generic Penetration: {generic_penetration}\n"
+    "  - Patient Burden: {patient_burden}\n"
+    "  - Competition Level: {competition_level}"
+)
+
+# Seconds the merged market data is reused before the DB and JSON are re-read
+_DATA_CACHE_TTL = settings.PHARMA_TOOLS_CACHE_TTL
+# Seconds a rendered tool response stays cached, keyed on resolved entities
+_TOOL_CACHE_TTL = settings.TOOL_CACHE_TTL
+
+
+def _ttl_bucket() -> int:
+    """Current cache generation; advances every _DATA_CACHE_TTL seconds."""
+    return int(time.monotonic() // _DATA_CACHE_TTL)
+
+
+def _load_iqvia_data() -> tuple:
+    """Return the merged IQVIA market data, reloaded at most once per _DATA_CACHE_TTL."""
+    return _load_iqvia_snapshot(_ttl_bucket())
+
+
+@lru_cache(maxsize=1)
+def _load_iqvia_snapshot(ttl_bucket: int) -> tuple:
     """Load IQVIA market data from JSON file, with optional DB merge."""
     all_data = []
     
     # First try database
     try:
-        from ..database.db import get_db_session
-        from ..database.models import MarketData
-        
-        with get_db_session() as db:
-            records = db.query(MarketData).all()
-            if records:
-                for r in records:
-                    all_data.append({
-                        "molecule": r.molecule,
-                        "region": r.region,
-                        "therapy_area": r.therapy_area,
-                        "indication": r.indication,
-                        "market_size_usd_mn": r.market_size_usd_mn,
-                        "cagr_percent": r.cagr_percent,
-                        "top_competitors": r.top_competitors or [],
-                        "generic_penetration": r.generic_penetration,
-                        "patient_burden": r.patient_burden,
-                        "competition_level": r.competition_level
-                    })
+        all_data.extend(_fetch_market_rows())
     except Exception:
         pass
     
-    # Always also load JSON file and merge (JSON has more data)
-    data_path = Path(__file__).resolve().parent.parent.parent / "mock_data" / "iqvia_market_data.json"
-    if data_path.exists():
-        with open(data_path, "r") as f:
-            json_data = json.load(f)
-            # Add JSON entries that aren't already in DB data
-            existing_molecules = {d.get("molecule", "").lower() for d in all_data}
-            for entry in json_data:
-                if entry.get("molecule", "").lower() not in existing_molecules:
-                    all_data.append(entry)
+    # Deployments with a fully seeded DB can skip the JSON merge entirely
+    if all_data and settings.PHARMA_DISABLE_JSON_MERGE:
+        return _freeze_market_data(all_data)
+    
+    # Also merge the JSON file (JSON has more data)
+    if _IQVIA_JSON_PATH.exists():
+        json_data = _load_market_json(_IQVIA_JSON_PATH.stat().st_mtime_ns)
+        # Add JSON entries that aren't already in DB data
+        existing_molecules = {d.get("molecule", "").lower() for d in all_data}
+        for entry in json_data:
+            if entry.get("molecule", "").lower() not in existing_molecules:
+                all_data.append(entry)
     
-    return all_data
+    return _freeze_market_data(all_data)
+
+
+@lru_cache(maxsize=1)
+def _load_market_json(mtime_ns: int) -> list:
+    """Parse the IQVIA JSON file; re-parsed only when its modification time changes."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(_IQVIA_JSON_PATH.read_bytes())
+    with open(_IQVIA_JSON_PATH, "r") as f:
+        return json.load(f)
+
+
+def _freeze_market_data(all_data: list) -> tuple:
+    """Precompute lowercased filter fields and return the data as an immutable sequence."""
+    # Lowercase the filterable fields once instead of on every comparison
+    for entry in all_data:
+        entry["_molecule_lc"] = (entry.get("molecule") or "").lower()
+        entry["_region_lc"] = (entry.get("region") or "").lower()
+        entry["_therapy_area_lc"] = (entry.get("therapy_area") or "").lower()
+    
+    # Shared across calls, so hand out an immutable sequence
+    return tuple(all_data)
+
+
+@lru_cache(maxsize=1)
+def _market_molecule_index(ttl_bucket: int) -> dict:
+    """Exact lowercased molecule name -> every entry whose molecule contains it, in load order."""
+    entries = _load_iqvia_snapshot(ttl_bucket)
+    index = {}
+    for entry in entries:
+        key = entry["_molecule_lc"]
+        if key not in index:
+            index[key] = tuple(e for e in entries if key in e["_molecule_lc"])
+    return index
 
 
 @tool("Query IQVIA Market Data")
@@ -141,58 +255,81 @@ def query_iqvia_market(molecule: Optional[str] = None, region: Optional[str] = N
     try:
         # Extract from query if parameters not provided
         if query:
-            if not molecule:
-                molecule = _extract_entity_from_query(query, "molecule")
-            if not region:
-                region = _extract_entity_from_query(query, "region")
-            if not therapy_area:
-                therapy_area = _extract_entity_from_query(query, "therapy_area")
+            missing = tuple(name for name, value in (
+                ("molecule", molecule), ("region", region), ("therapy_area", therapy_area)
+            ) if not value)
+            if missing:
+                extracted = _extract_entities(query, missing)
+                molecule = molecule or extracted.get("molecule")
+                region = region or extracted.get("region")
+                therapy_area = therapy_area or extracted.get("therapy_area")
         
-        data = _load_iqvia_data()
+        return redis_cache.get_or_set(
+            make_key("tool:iqvia_market", molecule, region, therapy_area),
+            lambda: _render_iqvia_market(molecule, region, therapy_area),
+            ttl_seconds=_TOOL_CACHE_TTL
+        )
+    
+    except Exception as e:
+        return f"Error querying market data: {str(e)}"
+
+
+def _render_iqvia_market(molecule: Optional[str], region: Optional[str], therapy_area: Optional[str]) -> str:
+    """Fetch and format market data for already-resolved filters."""
+    # Let the database apply the filters; fall back to the merged snapshot if it has nothing
+    results = _query_iqvia(molecule, region, therapy_area)
+    
+    if not results:
         results = []
+        ttl_bucket = _ttl_bucket()
+        data = _load_iqvia_snapshot(ttl_bucket)
+        molecule_lc = molecule.lower() if molecule else None
+        region_lc = region.lower() if region else None
+        therapy_area_lc = therapy_area.lower() if therapy_area else None
+        
+        # Exact molecule names resolve straight to their candidate entries
+        if molecule_lc:
+            data = _market_molecule_index(ttl_bucket).get(molecule_lc, data)
         
         for entry in data:
             # Filter by molecule if provided
-            if molecule and molecule.lower() not in entry.get("molecule", "").lower():
+            if molecule_lc and molecule_lc not in entry["_molecule_lc"]:
                 continue
             # Filter by region if provided
-            if region and region.lower() not in entry.get("region", "").lower():
+            if region_lc and region_lc not in entry["_region_lc"]:
                 continue
             # Filter by therapy area if provided
-            if therapy_area and therapy_area.lower() not in entry.get("therapy_area", "").lower():
+            if therapy_area_lc and therapy_area_lc not in entry["_therapy_area_lc"]:
                 continue
             results.append(entry)
+    
+    if not results:
+        filters = []
+        if molecule:
+            filters.append(f"molecule='{molecule}'")
+        if region:
+            filters.append(f"region='{region}'")
+        if therapy_area:
+            filters.append(f"therapy_area='{therapy_area}'")
         
-        if not results:
-            filters = []
-            if molecule:
-                filters.append(f"molecule='{molecule}'")
-            if region:
-                filters.append(f"region='{region}'")
-            if therapy_area:
-                filters.append(f"therapy_area='{therapy_area}'")
-            
-            filter_str = ", ".join(filters) if filters else "the specified criteria"
-            return f"No market data found for {filter_str}. Try different search terms or check available data in the database."
-        
-        # Format results
-        output = []
-        for r in results:
-            output.append(
-                f"**{r['molecule']}** ({r['region']}):\n"
-                f"  - Therapy Area: {r.get('therapy_area', 'N/A')}\n"
-                f"  - Market Size: ${r['market_size_usd_mn']}M USD\n"
-                f"  - CAGR: {r['cagr_percent']}%\n"
-                f"  - Top Competitors: {', '.join(r['top_competitors'])}\n"
-                f"  - Generic Penetration: {r['generic_penetration']}\n"
-                f"  - Patient Burden: {r.get('patient_burden', 'N/A')}\n"
-                f"  - Competition Level: {r.get('competition_level', 'N/A')}"
-            )
-        
-        return "\n\n".join(output)
+        filter_str = ", ".join(filters) if filters else "the specified criteria"
+        return f"No market data found for {filter_str}. Try different search terms or check available data in the database."
     
-    except Exception as e:
-        return f"Error querying market data: {str(e)}"
+    # Format results
+    return "\n\n".join(
+        _IQVIA_ENTRY_TEMPLATE.format_map({
+            "molecule": r["molecule"],
+            "region": r["region"],
+            "therapy_area": r.get("therapy_area", "N/A"),
+            "market_size": r["market_size_usd_mn"],
+            "cagr": r["cagr_percent"],
+            "competitors": ", ".join(r["top_competitors"]),
+            "generic_penetration": r["generic_penetration"],
+            "patient_burden": r.get("patient_burden", "N/A"),
+            "competition_level": r.get("competition_level", "N/A"),
+        })
+        for r in results
+    )
 
 
 @tool("Find Low Competition Markets")
@@ -210,11 +347,10 @@ def find_low_competition_markets(therapy_area: Optional[str] = None, region: Opt
     """
     try:
         # Extract from query if parameters not provided
-        if query:
-            if not therapy_area:
-                therapy_area = _extract_entity_from_query(query, "therapy_area")
-            if not region:
-                region = _extract_entity_from_query(query, "region")
+        if query and not (therapy_area and region):
+            extracted = _extract_entities(query, ("therapy_area", "region"))
+            therapy_area = therapy_area or extracted["therapy_area"]
+            region = region or extracted["region"]
         
         # Default values if still not found
         if not therapy_area:
@@ -222,43 +358,54 @@ def find_low_competition_markets(therapy_area: Optional[str] = None, region: Opt
         if not region:
             region = "India"
         
-        data = _load_iqvia_data()
-        opportunities = []
-        
-        for entry in data:
-            # Check therapy area match
-            if therapy_area.lower() not in entry.get("therapy_area", "").lower():
-                continue
-            # Check region match
-            if region.lower() not in entry.get("region", "").lower():
-                continue
-            # Check for low competition
-            competition = entry.get("competition_level", entry.get("generic_penetration", ""))
-            if competition.lower() in ["low", "medium"]:
-                opportunities.append({
-                    "molecule": entry["molecule"],
-                    "indication": entry.get("indication", entry.get("therapy_area")),
-                    "market_size": entry["market_size_usd_mn"],
-                    "cagr": entry["cagr_percent"],
-                    "competition": competition,
-                    "patient_burden": entry.get("patient_burden", "N/A")
-                })
-        
-        if not opportunities:
-            return f"No low competition opportunities found in {therapy_area} for {region}. Try different therapy areas like: Respiratory, Oncology, Diabetes, Cardiology."
-        
-        # Sort by CAGR (highest first)
-        opportunities.sort(key=lambda x: x["cagr"], reverse=True)
-        
-        output = [f"**Whitespace Opportunities in {therapy_area} ({region}):**\n"]
-        for opp in opportunities:
-            output.append(
-                f"- **{opp['molecule']}** ({opp['indication']})\n"
-                f"  Market: ${opp['market_size']}M | CAGR: {opp['cagr']}% | "
-                f"Competition: {opp['competition']} | Patient Burden: {opp['patient_burden']}"
-            )
-        
-        return "\n".join(output)
+        return redis_cache.get_or_set(
+            make_key("tool:low_competition", therapy_area, region),
+            lambda: _render_low_competition_markets(therapy_area, region),
+            ttl_seconds=_TOOL_CACHE_TTL
+        )
     
     except Exception as e:
         return f"Error finding opportunities: {str(e)}"
+
+
+def _render_low_competition_markets(therapy_area: str, region: str) -> str:
+    """Find and format whitespace opportunities for a resolved therapy area and region."""
+    data = _load_iqvia_data()
+    opportunities = []
+    therapy_area_lc = therapy_area.lower()
+    region_lc = region.lower()
+    
+    for entry in data:
+        # Check therapy area match
+        if therapy_area_lc not in entry["_therapy_area_lc"]:
+            continue
+        # Check region match
+        if region_lc not in entry["_region_lc"]:
+            continue
+        # Check for low competition
+        competition = entry.get("competition_level", entry.get("generic_penetration", ""))
+        if competition.lower() in ["low", "medium"]:
+            opportunities.append({
+                "molecule": entry["molecule"],
+                "indication": entry.get("indication", entry.get("therapy_area")),
+                "market_size": entry["market_size_usd_mn"],
+                "cagr": entry["cagr_percent"],
+                "competition": competition,
+                "patient_burden": entry.get("patient_burden", "N/A")
+            })
+    
+    if not opportunities:
+        return f"No low competition opportunities found in {therapy_area} for {region}. Try different therapy areas like: Respiratory, Oncology, Diabetes, Cardiology."
+    
+    # Sort by CAGR (highest first)
+    opportunities.sort(key=lambda x: x["cagr"], reverse=True)
+    
+    output = [f"**Whitespace Opportunities in {therapy_area} ({region}):**\n"]
+    for opp in opportunities:
+        output.append(
+            f"- **{opp['molecule']}** ({opp['indication']})\n"
+            f"  Market: ${opp['market_size']}M | CAGR: {opp['cagr']}% | "
+            f"Competition: {opp['competition']} | Patient Burden: {opp['patient_burden']}"
+        )
+    
+    return "\n".join(output)
@@ -3,16 +3,70 @@ Patent Landscape Tool
 Queries database for patent expiry and FTO analysis.
 """
 import json
+import os
+import re
+import time
 from datetime import datetime
+from functools import lru_cache
 from crewai.tools import tool
 import sys
 from pathlib import Path
+from typing import Optional
 
 # Add project root to path
 project_root = Path(__file__).resolve().parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from src.config.settings import settings
+from src.infra.cache import RedisCache
+from src.infra.redis_client import get_shared_redis_client
+from src.tools._entity_index import DRUG_SUFFIXES, best_match, build_matcher
 
+
+# Brand names are checked before molecule names
+_BRAND_TO_MOLECULE = {
+    "dolo": "Paracetamol", "dolo650": "Paracetamol", "dolo 650": "Paracetamol",
+    "keytruda": "Pembrolizumab", "januvia": "Sitagliptin",
+    "xarelto": "Rivaroxaban", "esbriet": "Pirfenidone",
+    "spiriva": "Tiotropium", "humira": "Adalimumab",
+    "ozempic": "Semaglutide", "wegovy": "Semaglutide",
+    "herceptin": "Trastuzumab", "revlimid": "Lenalidomide",
+    "flovent": "Fluticasone", "xolair": "Omalizumab"
+}
+
+# Known molecules in our database
+_KNOWN_MOLECULES = (
+    "pembrolizumab", "sitagliptin", "rivaroxaban", "pirfenidone",
+    "roflumilast", "tiotropium", "omalizumab", "fluticasone",
+    "metformin", "trastuzumab", "semaglutide", "adalimumab",
+    "paracetamol", "azithromycin", "pantoprazole", "atorvastatin",
+    "escitalopram", "montelukast", "lenalidomide", "amlodipine"
+)
+
+_MOLECULE_MATCHER = build_matcher({
+    **_BRAND_TO_MOLECULE,
+    **{mol: mol.capitalize() for mol in _KNOWN_MOLECULES},
+})
+
+# Common words to skip when looking for drug names
+_SKIP_WORDS = frozenset({
+    "check", "patent", "expiry", "expire", "expires", "for", "the", "a", "an",
+    "what", "when", "where", "how", "is", "are", "was", "were", "will", "about",
+    "find", "get", "show", "tell", "me", "information", "info", "data", "details",
+    "drug", "molecule", "medicine", "pharmaceutical", "latest", "related", "to",
+    "in", "of", "on", "at", "by", "with", "from", "and", "or", "us", "india"
+})
+
+_DRUG_SUFFIXES = DRUG_SUFFIXES + ("tide",)
+
+# Query words are split on whitespace and the punctuation , . ?
+_WORD_RE = re.compile(r"[^\s,.?]+")
+
+# Any query word with 3+ characters before a drug suffix
+_DRUG_SUFFIX_RE = re.compile(rf"(?<![^\s,.?])([^\s,.?]{{3,}}(?:{'|'.join(_DRUG_SUFFIXES)}))(?![^\s,.?])")
+
+
+@lru_cache(maxsize=4096)
 def _extract_molecule_from_query(query: str) -> str:
     """
     Extract molecule/drug name from a natural language query.
@@ -23,43 +77,10 @@ def _extract_molecule_from_query(query: str) -> str:
     
     query_lower = query.lower()
     
-    # Brand name mappings
-    brand_to_molecule = {
-        "dolo": "Paracetamol", "dolo650": "Paracetamol", "dolo 650": "Paracetamol",
-        "keytruda": "Pembrolizumab", "januvia": "Sitagliptin",
-        "xarelto": "Rivaroxaban", "esbriet": "Pirfenidone",
-        "spiriva": "Tiotropium", "humira": "Adalimumab",
-        "ozempic": "Semaglutide", "wegovy": "Semaglutide",
-        "herceptin": "Trastuzumab", "revlimid": "Lenalidomide",
-        "flovent": "Fluticasone", "xolair": "Omalizumab"
-    }
-    
-    for brand, mol in brand_to_molecule.items():
-        if brand in query_lower:
-            return mol
-    
-    # Known molecules in our database
-    known_molecules = [
-        "pembrolizumab", "sitagliptin", "rivaroxaban", "pirfenidone",
-        "roflumilast", "tiotropium", "omalizumab", "fluticasone",
-        "metformin", "trastuzumab", "semaglutide", "adalimumab",
-        "paracetamol", "azithromycin", "pantoprazole", "atorvastatin",
-        "escitalopram", "montelukast", "lenalidomide", "amlodipine"
-    ]
-    
-    # Check for known molecules
-    for mol in known_molecules:
-        if mol in query_lower:
-            return mol.capitalize()
-    
-    # Common words to skip when looking for drug names
-    skip_words = {
-        "check", "patent", "expiry", "expire", "expires", "for", "the", "a", "an",
-        "what", "when", "where", "how", "is", "are", "was", "were", "will", "about",
-        "find", "get", "show", "tell", "me", "information", "info", "data", "details",
-        "drug", "molecule", "medicine", "pharmaceutical", "latest", "related", "to",
-        "in", "of", "on", "at", "by", "with", "from", "and", "or", "us", "india"
-    }
+    # Brand names and known molecules in a single scan
+    molecule = best_match(_MOLECULE_MATCHER, query_lower)
+    if molecule:
+        return molecule
     
     # Try to extract word after "for" (e.g., "Check patent expiry for coldact")
     if " for " in query_lower:
@@ -67,70 +88,92 @@ def _extract_molecule_from_query(query: str) -> str:
         if len(parts) > 1:
             # Get first word after "for"
             after_for = parts[-1].strip().split()[0] if parts[-1].strip() else None
-            if after_for and after_for not in skip_words and len(after_for) > 2:
+            if after_for and after_for not in _SKIP_WORDS and len(after_for) > 2:
                 return after_for.capitalize()
     
     # Try to find molecule-like words (ending in common suffixes)
-    words = query.replace(",", " ").replace(".", " ").replace("?", " ").split()
-    drug_suffixes = ["mab", "nib", "lib", "vir", "stat", "pril", "olol", 
-                     "sartan", "pine", "azole", "mycin", "cillin", "done",
-                     "prazole", "gliptin", "formin", "xaban", "tide"]
-    
-    for word in words:
-        word_clean = word.lower().strip()
-        for suffix in drug_suffixes:
-            if word_clean.endswith(suffix) and len(word_clean) > len(suffix) + 2:
-                return word_clean.capitalize()
+    match = _DRUG_SUFFIX_RE.search(query_lower)
+    if match:
+        return match.group(1).capitalize()
     
     # Last resort: find the last non-common word
-    for word in reversed(words):
-        word_clean = word.lower().strip()
-        if word_clean not in skip_words and len(word_clean) > 2:
-            return word.strip().capitalize()
+    for word in reversed(_WORD_RE.findall(query)):
+        word_clean = word.lower()
+        if word_clean not in _SKIP_WORDS and len(word_clean) > 2:
+            return word.capitalize()
     
     return None
 
 
+def _resolve_molecule(molecule: Optional[str], query: Optional[str], capitalized_fallback: bool = False) -> str:
+    """
+    Return the given molecule, else one extracted from query, else the query itself.
+    With capitalized_fallback, the first capitalized word of the query is tried
+    before falling back to the whole query.
+    """
+    if not molecule and query:
+        molecule = _extract_molecule_from_query(query)
+        if not molecule and capitalized_fallback:
+            # Look for capitalized words that might be drug names
+            molecule = next((word for word in _WORD_RE.findall(query) if len(word) > 3 and word[0].isupper()), None)
+    return molecule or query or "unspecified molecule"
+
+
 def _query_database(molecule: str = None):
     """Query patents from database."""
     try:
+        from sqlalchemy import select
         from src.database.db import get_db_session
         from src.database.models import Patent
         
         with get_db_session() as session:
+            # Only the columns we render, as plain rows rather than ORM entities
+            query = select(
+                Patent.molecule, Patent.patent_number, Patent.patent_type,
+                Patent.expiry_date, Patent.status, Patent.country
+            )
+            
             if molecule:
                 # Search for specific molecule (case-insensitive)
-                patents = session.query(Patent).filter(
-                    Patent.molecule.ilike(f"%{molecule}%")
-                ).all()
-            else:
-                # Get all patents
-                patents = session.query(Patent).all()
+                query = query.where(Patent.molecule.icontains(molecule, autoescape=True))
             
-            if not patents:
-                return None
-            
-            # Group by molecule
+            # Group by molecule, keeping molecules in first-seen order
             results = {}
-            for p in patents:
-                mol_name = p.molecule
-                if mol_name not in results:
-                    results[mol_name] = {"molecule": mol_name, "patents": []}
-                results[mol_name]["patents"].append({
+            for p in session.execute(query).yield_per(500):
+                entry = results.get(p.molecule)
+                if entry is None:
+                    entry = results[p.molecule] = {"molecule": p.molecule, "patents": []}
+                entry["patents"].append({
                     "patent_number": p.patent_number,
                     "type": p.patent_type,
                     "expiry_date": p.expiry_date.strftime("%Y-%m-%d") if p.expiry_date else None,
+                    "expiry_date_raw": p.expiry_date,
                     "status": p.status.value if hasattr(p.status, 'value') else str(p.status),
                     "country": p.country
                 })
             
-            return list(results.values())
+            return list(results.values()) or None
     except Exception as e:
         print(f"Database query error: {e}")
         return None
 
 
-def _load_patent_data() -> list:
+# Seconds the merged patent data is reused before the DB and JSON are re-read
+_DATA_CACHE_TTL = settings.PHARMA_TOOLS_CACHE_TTL
+# Seconds a Tavily lookup is reused for the same molecule; patent status
+# changes slowly, and with REDIS_URL set the cache is shared by all workers
+_WEB_CACHE_TTL = int(os.getenv("TAVILY_CACHE_TTL", "86400"))
+# Tavily results only; other callers keep their per-process caches
+_web_cache = RedisCache(client=get_shared_redis_client())
+
+
+def _ttl_bucket() -> int:
+    """Current cache generation; advances every _DATA_CACHE_TTL seconds."""
+    return int(time.monotonic() // _DATA_CACHE_TTL)
+
+
+@lru_cache(maxsize=1)
+def _load_patent_snapshot(ttl_bucket: int) -> tuple:
     """Load patent data from JSON file, merging with DB if available."""
     all_data = []
     
@@ -148,39 +191,145 @@ def _load_patent_data() -> list:
             existing_molecules = {d.get("molecule", "").lower() for d in all_data}
             for entry in json_data:
                 if entry.get("molecule", "").lower() not in existing_molecules:
+                    # Parse the dates once per snapshot rather than on every tool call
+                    for patent in entry.get("patents", []):
+                        patent["expiry_date_raw"] = _parse_expiry(patent.get("expiry_date"))
                     all_data.append(entry)
     
-    return all_data
+    # Shared across calls, so hand out an immutable sequence
+    return tuple(all_data)
+
+
+def _parse_expiry(expiry_date) -> Optional[datetime]:
+    """Parse an ISO expiry date, or None if it is missing or malformed."""
+    try:
+        return datetime.fromisoformat(expiry_date)
+    except (TypeError, ValueError):
+        return None
+
+
+def _expiry_datetime(patent: dict) -> datetime:
+    """Expiry of a patent entry, preferring the value parsed at load time."""
+    # Unparseable dates raise here, as they did when every call re-parsed them
+    return patent.get("expiry_date_raw") or datetime.fromisoformat(patent["expiry_date"])
+
+
+@lru_cache(maxsize=1)
+def _patent_molecule_index(ttl_bucket: int) -> dict:
+    """Exact lowercased molecule name -> first entry whose molecule contains it."""
+    entries = _load_patent_snapshot(ttl_bucket)
+    names = [entry.get("molecule", "").lower() for entry in entries]
+    index = {}
+    for name in names:
+        if name not in index:
+            index[name] = next(entries[i] for i, other in enumerate(names) if name in other)
+    return index
+
+
+def _find_patent_entry(molecule_lc: str) -> Optional[dict]:
+    """Return the first patent entry whose molecule contains molecule_lc."""
+    ttl_bucket = _ttl_bucket()
+    entry = _patent_molecule_index(ttl_bucket).get(molecule_lc)
+    if entry is not None:
+        return entry
+    # Not an exact molecule name - fall back to the substring scan
+    return next(
+        (e for e in _load_patent_snapshot(ttl_bucket) if molecule_lc in e.get("molecule", "").lower()),
+        None
+    )
+
+
+def _count_active_patents(entry: dict, today: datetime) -> tuple:
+    """Count unexpired (composition of matter, formulation/other) patents of an entry."""
+    active_types = [
+        patent["type"].lower() for patent in entry.get("patents", [])
+        if _expiry_datetime(patent) > today
+    ]
+    composition = sum("composition" in patent_type for patent_type in active_types)
+    return composition, len(active_types) - composition
+
+
+def _drug_info_key(molecule: str) -> str:
+    """Cache key for the Tavily drug info of a molecule."""
+    return f"tavily:drug_info:{molecule.strip().lower()}"
 
 
 def _fetch_and_cache_drug_info(molecule: str) -> dict:
     """
-    Fetch drug info using Tavily web search.
+    Fetch drug info using Tavily web search, reusing results for _WEB_CACHE_TTL seconds.
     Falls back to this when database has no results.
     """
+    def search() -> str:
+        info = _search_drug_info(molecule)
+        return json.dumps(info) if info else ""
+    
+    cached = _web_cache.get_or_set(_drug_info_key(molecule), search, ttl_seconds=_WEB_CACHE_TTL)
+    return json.loads(cached) if cached else None
+
+
+def _tavily_client():
+    """Return a Tavily client, or None when no API key is configured."""
+    from dotenv import load_dotenv
+    
+    load_dotenv()
+    
+    tavily_key = os.getenv("TAVILY_API_KEY")
+    if not tavily_key:
+        return None
+    
+    from tavily import TavilyClient
+    
+    return TavilyClient(api_key=tavily_key)
+
+
+def _tavily_search(client, query: str) -> dict:
+    """Run a Tavily search, waiting for a slot under the per-minute API cap."""
+    from src.services.rate_limiter import tavily_throttle
+    
+    tavily_throttle.wait()
+    return client.search(
+        query=query,
+        search_depth="advanced",
+        max_results=10,
+        include_answer=True
+    )
+
+
+def _source_summary(r: dict) -> dict:
+    """Trim a Tavily search result to the fields shown in tool output."""
+    return {
+        "title": r.get("title", "")[:80],
+        "snippet": r.get("content", "")[:250],
+        "url": r.get("url", "")
+    }
+
+
+def _relevant_sources(molecule: str, results: list) -> list:
+    """The first 3 search results that mention the molecule, in one pass."""
+    molecule_lower = molecule.lower()
+    relevant_sources = []
+    
+    for r in results:
+        if (molecule_lower in (r.get("content") or "").lower()
+                or molecule_lower in (r.get("title") or "").lower()):
+            relevant_sources.append(_source_summary(r))
+            if len(relevant_sources) == 3:
+                break
+    
+    return relevant_sources
+
+
+def _search_drug_info(molecule: str) -> dict:
+    """Search Tavily for patent and generic status of a molecule."""
     try:
-        import os
-        from dotenv import load_dotenv
-        
-        load_dotenv()
-        
-        tavily_key = os.getenv("TAVILY_API_KEY")
-        if not tavily_key:
+        client = _tavily_client()
+        if not client:
             return None
         
-        from tavily import TavilyClient
-        
-        client = TavilyClient(api_key=tavily_key)
-        
         # Create specific search query - focused on the drug and patent info
         query = f'"{molecule}" patent expiry status generic version manufacturer active ingredient'
         
-        response = client.search(
-            query=query,
-            search_depth="advanced",
-            max_results=10,
-            include_answer=True
-        )
+        response = _tavily_search(client, query)
         
         if not response:
             return None
@@ -195,32 +344,15 @@ def _fetch_and_cache_drug_info(molecule: str) -> dict:
         if response.get("answer"):
             result["info"]["summary"] = response["answer"]
         
-        # Filter and extract relevant sources - only keep those that mention the drug
-        molecule_lower = molecule.lower()
-        relevant_sources = []
-        
-        for r in response.get("results", []):
-            content = (r.get("content") or "").lower()
-            title = (r.get("title") or "").lower()
-            
-            # Only include if the drug name appears in content or title
-            if molecule_lower in content or molecule_lower in title:
-                relevant_sources.append({
-                    "title": r.get("title", "")[:80],
-                    "snippet": r.get("content", "")[:250],
-                    "url": r.get("url", "")
-                })
+        # Only keep sources that mention the drug
+        results = response.get("results", [])
+        relevant_sources = _relevant_sources(molecule, results)
         
         # If no relevant sources, use top 3 general results
         if not relevant_sources:
-            for r in response.get("results", [])[:3]:
-                relevant_sources.append({
-                    "title": r.get("title", "")[:80],
-                    "snippet": r.get("content", "")[:250],
-                    "url": r.get("url", "")
-                })
+            relevant_sources = [_source_summary(r) for r in results[:3]]
         
-        result["info"]["sources"] = relevant_sources[:3]  # Limit to 3 sources
+        result["info"]["sources"] = relevant_sources
         result["info"]["data_source"] = "Tavily Web Search"
         
         return result
@@ -230,8 +362,6 @@ def _fetch_and_cache_drug_info(molecule: str) -> dict:
         return None
 
 
-
-
 @tool("Query Patent Data")
 def query_patents(molecule: str = None, query: str = None) -> str:
     """
@@ -246,31 +376,15 @@ def query_patents(molecule: str = None, query: str = None) -> str:
         Patent details including patent numbers, types, expiry dates, and status.
     """
     try:
-        if not molecule and query:
-            molecule = _extract_molecule_from_query(query)
-        if not molecule:
-            # Try to extract any drug name from query
-            if query:
-                words = query.replace(",", " ").replace(".", " ").replace("?", " ").split()
-                # Look for capitalized words that might be drug names
-                for word in words:
-                    if len(word) > 3 and word[0].isupper():
-                        molecule = word
-                        break
-            if not molecule:
-                molecule = query or "unspecified molecule"
-        
-        # Load all data (DB + JSON)
-        all_data = _load_patent_data()
+        molecule = _resolve_molecule(molecule, query, capitalized_fallback=True)
         
-        # Filter by molecule
-        data = [d for d in all_data if molecule.lower() in d.get("molecule", "").lower()]
+        # First molecule in the merged DB + JSON data matching the name
+        result = _find_patent_entry(molecule.lower())
         
-        if data:
-            result = data[0]  # Get first matching molecule
-            
+        if result:
             # Format output
             output = [f"**Patent Landscape for {result['molecule']}:**\n"]
+            today = datetime.now()
             
             for patent in result.get("patents", []):
                 expiry_date = patent["expiry_date"]
@@ -278,8 +392,7 @@ def query_patents(molecule: str = None, query: str = None) -> str:
                 
                 # Calculate days until expiry
                 try:
-                    expiry = datetime.strptime(expiry_date, "%Y-%m-%d")
-                    today = datetime.now()
+                    expiry = _expiry_datetime(patent)
                     days_remaining = (expiry - today).days
                     
                     if days_remaining < 0:
@@ -357,26 +470,12 @@ def check_patent_expiry(molecule: str = None, country: str = "US", query: str =
         Patent expiry date and whether generic entry is possible.
     """
     try:
-        if not molecule and query:
-            molecule = _extract_molecule_from_query(query)
-        if not molecule:
-            # Try to extract any capitalized word from query as drug name
-            if query:
-                words = query.replace(",", " ").replace(".", " ").replace("?", " ").split()
-                for word in words:
-                    if len(word) > 3 and word[0].isupper():
-                        molecule = word
-                        break
-            if not molecule:
-                molecule = query or "unspecified molecule"
-        
-        # Load all data (DB + JSON)
-        all_data = _load_patent_data()
+        molecule = _resolve_molecule(molecule, query, capitalized_fallback=True)
         
-        # Filter by molecule
-        data = [d for d in all_data if molecule.lower() in d.get("molecule", "").lower()]
+        # First molecule in the merged DB + JSON data matching the name
+        result = _find_patent_entry(molecule.lower())
         
-        if not data:
+        if not result:
             # Try external APIs for drug information
             external_data = _fetch_and_cache_drug_info(molecule)
             
@@ -412,15 +511,13 @@ def check_patent_expiry(molecule: str = None, country: str = "US", query: str =
                 "- Available in database: Pembrolizumab, Sitagliptin, Rivaroxaban, Pirfenidone"
             )
         
-        result = data[0]
-        
         # Find earliest unexpired and latest expired patents
         today = datetime.now()
         active_patents = []
         expired_patents = []
         
         for patent in result.get("patents", []):
-            expiry = datetime.strptime(patent["expiry_date"], "%Y-%m-%d")
+            expiry = _expiry_datetime(patent)
             patent_info = {
                 "number": patent["patent_number"],
                 "type": patent["type"],
@@ -474,32 +571,15 @@ def assess_fto_risk(molecule: str = None, query: str = None) -> str:
         FTO risk level (High/Medium/Low) with explanation.
     """
     try:
-        if not molecule and query:
-            molecule = _extract_molecule_from_query(query)
-        if not molecule:
-            molecule = query or "unspecified molecule"
-        
-        # Load all data (DB + JSON)
-        all_data = _load_patent_data()
+        molecule = _resolve_molecule(molecule, query)
         
-        # Filter by molecule
-        data = [d for d in all_data if molecule.lower() in d.get("molecule", "").lower()]
+        # First molecule in the merged DB + JSON data matching the name
+        result = _find_patent_entry(molecule.lower())
         
-        if not data:
+        if not result:
             return f"No patent data found for {molecule}. FTO risk: UNCLEAR. Try: Pembrolizumab, Sitagliptin, Rivaroxaban, Semaglutide."
         
-        result = data[0]
-        today = datetime.now()
-        active_com_patents = 0  # Composition of Matter
-        active_form_patents = 0  # Formulation
-        
-        for patent in result.get("patents", []):
-            expiry = datetime.strptime(patent["expiry_date"], "%Y-%m-%d")
-            if expiry > today:
-                if "composition" in patent["type"].lower():
-                    active_com_patents += 1
-                else:
-                    active_form_patents += 1
+        active_com_patents, active_form_patents = _count_active_patents(result, datetime.now())
         
         # Determine risk level
         if active_com_patents > 0:
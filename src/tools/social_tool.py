@@ -3,6 +3,10 @@ Social Media Listening Tool
 Queries database for patient voice analysis.
 """
 import json
+import time
+from collections import Counter
+from functools import lru_cache
+from statistics import fmean
 from typing import Optional
 from crewai.tools import tool
 from pathlib import Path
@@ -12,75 +16,109 @@ import sys
 project_root = Path(__file__).resolve().parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
+from src.config.settings import settings
+from src.tools._entity_index import best_match, build_matcher, flatten_keywords
+
+
+_THERAPY_AREAS = {
+    "diabetes": ["diabetes", "diabetic", "injectable", "insulin", "glp-1", "weight", "obesity"],
+    "respiratory": ["respiratory", "inhaler", "copd", "asthma", "pulmonary"],
+    "oncology": ["oncology", "cancer", "chemo", "tumor"],
+    "cardiovascular": ["cardiac", "heart", "cardiovascular", "blood pressure", "cholesterol"],
+    "cns": ["depression", "anxiety", "mental", "psychiatric", "neuro", "brain"],
+    "autoimmune": ["autoimmune", "rheumatoid", "crohn", "arthritis", "psoriasis"],
+    "analgesic": ["pain", "fever", "headache", "analgesic"],
+    "gastrointestinal": ["gerd", "acid", "reflux", "gastro", "ulcer", "stomach"]
+}
+
+# Brand names are checked before molecule names
+_BRAND_TO_MOLECULE = {
+    "ozempic": "Semaglutide", "wegovy": "Semaglutide",
+    "mounjaro": "Tirzepatide", "humira": "Adalimumab",
+    "dolo": "Paracetamol", "calpol": "Paracetamol",
+    "pan": "Pantoprazole", "nexito": "Escitalopram"
+}
+
+_KNOWN_MOLECULES = (
+    "insulin", "semaglutide", "tirzepatide", "metformin", "sitagliptin",
+    "adalimumab", "escitalopram", "pantoprazole", "paracetamol",
+    "atorvastatin", "amlodipine", "rivaroxaban", "azithromycin", "montelukast",
+    "tiotropium", "fluticasone", "pirfenidone", "pembrolizumab", "trastuzumab", "lenalidomide"
+)
+
+_ENTITY_MATCHERS = {
+    "therapy_area": build_matcher(flatten_keywords(
+        _THERAPY_AREAS, lambda area: area.capitalize() if area not in ["cns"] else area.upper()
+    )),
+    "molecule": build_matcher({
+        **_BRAND_TO_MOLECULE,
+        **{mol: mol.capitalize() for mol in _KNOWN_MOLECULES},
+    }),
+}
+
+
+@lru_cache(maxsize=4096)
 def _extract_entity_from_query(query: str, entity_type: str = "therapy_area") -> str:
     """Extract entities from natural language query."""
     if not query:
         return None
     
-    query_lower = query.lower()
-    
-    if entity_type == "therapy_area":
-        areas = {
-            "diabetes": ["diabetes", "diabetic", "injectable", "insulin", "glp-1", "weight", "obesity"],
-            "respiratory": ["respiratory", "inhaler", "copd", "asthma", "pulmonary"],
-            "oncology": ["oncology", "cancer", "chemo", "tumor"],
-            "cardiovascular": ["cardiac", "heart", "cardiovascular", "blood pressure", "cholesterol"],
-            "cns": ["depression", "anxiety", "mental", "psychiatric", "neuro", "brain"],
-            "autoimmune": ["autoimmune", "rheumatoid", "crohn", "arthritis", "psoriasis"],
-            "analgesic": ["pain", "fever", "headache", "analgesic"],
-            "gastrointestinal": ["gerd", "acid", "reflux", "gastro", "ulcer", "stomach"]
-        }
-        for area, keywords in areas.items():
-            for keyword in keywords:
-                if keyword in query_lower:
-                    return area.capitalize() if area not in ["cns"] else area.upper()
-    
-    elif entity_type == "molecule":
-        # Brand name mappings
-        brand_to_molecule = {
-            "ozempic": "Semaglutide", "wegovy": "Semaglutide",
-            "mounjaro": "Tirzepatide", "humira": "Adalimumab",
-            "dolo": "Paracetamol", "calpol": "Paracetamol",
-            "pan": "Pantoprazole", "nexito": "Escitalopram"
-        }
-        for brand, mol in brand_to_molecule.items():
-            if brand in query_lower:
-                return mol
-        
-        known_molecules = [
-            "insulin", "semaglutide", "tirzepatide", "metformin", "sitagliptin",
-            "adalimumab", "escitalopram", "pantoprazole", "paracetamol",
-            "atorvastatin", "amlodipine", "rivaroxaban", "azithromycin", "montelukast",
-            "tiotropium", "fluticasone", "pirfenidone", "pembrolizumab", "trastuzumab", "lenalidomide"
-        ]
-        for mol in known_molecules:
-            if mol in query_lower:
-                return mol.capitalize()
-    
-    return None
+    matcher = _ENTITY_MATCHERS.get(entity_type)
+    if matcher is None:
+        return None
+    return best_match(matcher, query.lower())
+
+
+_SOCIAL_JSON_PATH = Path(__file__).resolve().parent.parent.parent / "mock_data" / "social_media_posts.json"
+
+# Seconds social posts are reused before the DB and JSON are re-read
+_DATA_CACHE_TTL = settings.PHARMA_TOOLS_CACHE_TTL
+
+
+def _ttl_bucket() -> int:
+    """Current cache generation; advances every _DATA_CACHE_TTL seconds."""
+    return int(time.monotonic() // _DATA_CACHE_TTL)
 
 
 def _query_database(therapy_area: str = None, molecule: str = None):
+    """Query social posts from database, reusing results for _DATA_CACHE_TTL seconds."""
+    # ILIKE filters are case-insensitive, so lowercase the cache key
+    return _query_database_cached(
+        therapy_area.lower() if therapy_area else therapy_area,
+        molecule.lower() if molecule else molecule,
+        _ttl_bucket()
+    )
+
+
+@lru_cache(maxsize=256)
+def _query_database_cached(therapy_area: Optional[str], molecule: Optional[str], ttl_bucket: int):
     """Query social posts from database."""
     try:
+        from sqlalchemy import select
         from src.database.db import get_db_session
         from src.database.models import SocialPost
         
         with get_db_session() as session:
-            query = session.query(SocialPost)
+            # Only the columns we render, as plain rows rather than ORM entities
+            query = select(
+                SocialPost.molecule, SocialPost.therapy_area, SocialPost.source,
+                SocialPost.post_date, SocialPost.post_text, SocialPost.sentiment,
+                SocialPost.complaint_theme
+            )
             
             if therapy_area:
-                query = query.filter(SocialPost.therapy_area.ilike(f"%{therapy_area}%"))
+                query = query.where(SocialPost.therapy_area.icontains(therapy_area, autoescape=True))
             if molecule:
-                query = query.filter(SocialPost.molecule.ilike(f"%{molecule}%"))
-            
-            results = query.all()
+                query = query.where(SocialPost.molecule.icontains(molecule, autoescape=True))
             
-            if not results:
-                return None
-            
-            return [{
+            # Stream rows in batches rather than buffering the whole result
+            results = tuple({
                 "molecule": r.molecule,
                 "therapy_area": r.therapy_area,
                 "source": r.source,
@@ -88,13 +126,21 @@ def _query_database(therapy_area: str = None, molecule: str = None):
                 "post_text": r.post_text,
                 "sentiment": r.sentiment or 0,
                 "complaint_theme": r.complaint_theme
-            } for r in results]
+            } for r in session.execute(query).yield_per(500))
+            
+            return results or None
     except Exception as e:
         print(f"Database query error: {e}")
         return None
 
 
-def _load_social_data() -> list:
+def _load_social_data() -> tuple:
+    """Return the merged social data, reloaded at most once per _DATA_CACHE_TTL."""
+    return _load_social_snapshot(_ttl_bucket())
+
+
+@lru_cache(maxsize=1)
+def _load_social_snapshot(ttl_bucket: int) -> tuple:
     """Load social data from JSON file, merging with DB if available."""
     all_data = []
     
@@ -104,17 +150,49 @@ def _load_social_data() -> list:
         all_data.extend(db_data)
     
     # Always also load JSON file for complete data
-    data_path = Path(__file__).resolve().parent.parent.parent / "mock_data" / "social_media_posts.json"
-    if data_path.exists():
-        with open(data_path, "r") as f:
-            json_data = json.load(f)
-            # Add JSON entries that aren't already in DB data
-            existing_molecules = {d.get("molecule", "").lower() for d in all_data}
-            for entry in json_data:
-                if entry.get("molecule", "").lower() not in existing_molecules:
-                    all_data.append(entry)
+    if _SOCIAL_JSON_PATH.exists():
+        json_data = _load_social_json(_SOCIAL_JSON_PATH.stat().st_mtime_ns)
+        # Add JSON entries that aren't already in DB data
+        existing_molecules = {d.get("molecule", "").lower() for d in all_data}
+        for entry in json_data:
+            if entry.get("molecule", "").lower() not in existing_molecules:
+                all_data.append(entry)
     
-    return all_data
+    # Shared across calls, so hand out an immutable sequence
+    return tuple(all_data)
+
+
+@lru_cache(maxsize=1)
+def _social_post_index(ttl_bucket: int) -> dict:
+    """(field, exact lowercased value) -> every post whose field contains it, in load order."""
+    posts = _load_social_snapshot(ttl_bucket)
+    index = {}
+    for field in ("molecule", "therapy_area"):
+        values = [post.get(field, "").lower() for post in posts]
+        for key in values:
+            if (field, key) not in index:
+                index[field, key] = tuple(post for post, value in zip(posts, values) if key in value)
+    return index
+
+
+def _find_posts(field: str, value: str) -> tuple:
+    """Posts whose field contains value (case-insensitive), in load order."""
+    ttl_bucket = _ttl_bucket()
+    value_lc = value.lower()
+    posts = _social_post_index(ttl_bucket).get((field, value_lc))
+    if posts is not None:
+        return posts
+    # Not an exact value - fall back to the substring scan
+    return tuple(p for p in _load_social_snapshot(ttl_bucket) if value_lc in p.get(field, "").lower())
+
+
+@lru_cache(maxsize=1)
+def _load_social_json(mtime_ns: int) -> list:
+    """Parse the social posts JSON file; re-parsed only when its modification time changes."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(_SOCIAL_JSON_PATH.read_bytes())
+    with open(_SOCIAL_JSON_PATH, "r") as f:
+        return json.load(f)
 
 
 @tool("Query Social Media Sentiment")
@@ -130,15 +208,15 @@ def query_social_media(molecule: Optional[str] = None, therapy_area: Optional[st
         Patient posts with sentiment scores and complaint themes.
     """
     try:
-        data = _load_social_data()
-        results = []
-        
-        for post in data:
-            if molecule and molecule.lower() not in post.get("molecule", "").lower():
-                continue
-            if therapy_area and therapy_area.lower() not in post.get("therapy_area", "").lower():
-                continue
-            results.append(post)
+        if molecule:
+            results = _find_posts("molecule", molecule)
+            if therapy_area:
+                therapy_area_lc = therapy_area.lower()
+                results = [p for p in results if therapy_area_lc in p.get("therapy_area", "").lower()]
+        elif therapy_area:
+            results = _find_posts("therapy_area", therapy_area)
+        else:
+            results = _load_social_data()
         
         if not results:
             return f"No social media data found for molecule='{molecule}', therapy_area='{therapy_area}'"
@@ -182,31 +260,25 @@ def analyze_patient_complaints(therapy_area: str = None, query: Optional[str] =
         if not therapy_area:
             therapy_area = query or "unspecified"
         
-        # Try database first
+        # Try database first, then the indexed merged data
         db_data = _query_database(therapy_area=therapy_area)
-        data = db_data if db_data else _load_social_data()
-        
-        # Filter by therapy area
-        posts = [p for p in data if therapy_area.lower() in p.get("therapy_area", "").lower()]
+        if db_data:
+            therapy_area_lc = therapy_area.lower()
+            posts = [p for p in db_data if therapy_area_lc in p.get("therapy_area", "").lower()]
+        else:
+            posts = _find_posts("therapy_area", therapy_area)
         
         if not posts:
             return f"No patient data found for therapy area: {therapy_area}"
         
         # Aggregate complaint themes
-        themes = {}
-        molecules = set()
-        total_sentiment = 0
-        
-        for post in posts:
-            theme = post.get("complaint_theme", "Other")
-            themes[theme] = themes.get(theme, 0) + 1
-            molecules.add(post["molecule"])
-            total_sentiment += post["sentiment"]
+        themes = Counter(post.get("complaint_theme", "Other") for post in posts)
+        # Distinct molecules in first-seen order, so identical inputs render identically
+        molecules = dict.fromkeys(post["molecule"] for post in posts)
+        avg_sentiment = fmean(post["sentiment"] for post in posts)
         
-        avg_sentiment = total_sentiment / len(posts)
-        
-        # Sort themes by frequency
-        sorted_themes = sorted(themes.items(), key=lambda x: x[1], reverse=True)
+        # Sort themes by frequency (ties keep first-seen order)
+        sorted_themes = themes.most_common()
         
         output = (
             f"**Patient Voice Analysis for {therapy_area}:**\n\n"
@@ -257,9 +329,7 @@ def get_patient_quotes(molecule: str, limit: int = 5) -> str:
         Direct patient quotes with sources and dates.
     """
     try:
-        data = _load_social_data()
-        
-        quotes = [p for p in data if molecule.lower() in p.get("molecule", "").lower()]
+        quotes = _find_posts("molecule", molecule)
         
         if not quotes:
             return f"No patient quotes found for: {molecule}"
@@ -3,19 +3,92 @@ Web Search Tool
 Queries mock web search results for external intelligence.
 """
 import json
-from crewai.tools import tool
+from collections import Counter
+from functools import lru_cache
+from itertools import islice
+from typing import NamedTuple
 from pathlib import Path
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
-def _load_web_data() -> list:
-    """Load web search mock data from JSON file."""
+
+class IndexedQuery(NamedTuple):
+    """A stored search with its query words tokenized once."""
+    entry: dict
+    tokens: frozenset
+
+
+# Joins title and snippet into one haystack; topics containing it are rejected,
+# so a match can never span both fields
+_HAYSTACK_SEP = "\0"
+
+
+class IndexedResult(NamedTuple):
+    """A stored search result with its matchable fields lowercased once."""
+    result: dict
+    haystack: str
+
+
+@lru_cache(maxsize=1)
+def _load_web_data() -> tuple:
+    """Load web search mock data from JSON file, parsed once per process."""
     data_path = Path(__file__).resolve().parent.parent.parent / "mock_data" / "web_search_results.json"
-    with open(data_path, "r") as f:
-        return json.load(f)
+    # The file is a few KB, so one bulk read and parse beats mapping or
+    # streaming it (incremental parsers like ijson only pay off for files of
+    # tens of MB); both decoders accept bytes directly
+    raw = data_path.read_bytes()
+    data = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+    # Shared across calls, so hand out an immutable sequence
+    return tuple(data)
+
+
+@lru_cache(maxsize=1)
+def _get_query_index() -> tuple:
+    """IndexedQuery entries for every stored search, in file order."""
+    return tuple(
+        IndexedQuery(entry, frozenset(entry.get("query", "").lower().split()))
+        for entry in _load_web_data()
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_query_word_index() -> dict:
+    """Inverted index mapping each query word to the positions of the stored searches containing it."""
+    word_index = {}
+    for position, indexed in enumerate(_get_query_index()):
+        for word in indexed.tokens:
+            word_index.setdefault(word, []).append(position)
+    return {word: tuple(positions) for word, positions in word_index.items()}
 
 
-@tool("Web Search")
-def web_search(query: str) -> str:
+@lru_cache(maxsize=1)
+def _get_results_index() -> tuple:
+    """IndexedResult entries for every stored search result, in file order."""
+    return tuple(
+        IndexedResult(result, f"{result.get('title', '')}{_HAYSTACK_SEP}{result.get('snippet', '')}".lower())
+        for entry in _load_web_data()
+        for result in entry.get("results", [])
+    )
+
+
+@lru_cache(maxsize=1024)
+def _news_for_topic(topic_lower: str, limit: int = 5) -> tuple:
+    """First results whose title or snippet contains the topic, stopping once limit are found."""
+    if _HAYSTACK_SEP in topic_lower:
+        return ()
+    # Substring matching keeps partial words and phrases working, so no token index
+    matches = (
+        indexed.result for indexed in _get_results_index()
+        if topic_lower in indexed.haystack
+    )
+    return tuple(islice(matches, limit))
+
+
+def _web_search(query: str) -> str:
     """
     Search the web for pharmaceutical news, approvals, and market intelligence.
     
@@ -26,26 +99,21 @@ def web_search(query: str) -> str:
         Search results with titles, URLs, and snippets.
     """
     try:
-        data = _load_web_data()
-        query_lower = query.lower()
+        query_words = set(query.lower().split())
+        word_index = _get_query_word_index()
         
         best_match = None
         best_score = 0
         
-        # Find best matching query in mock data
-        for entry in data:
-            stored_query = entry.get("query", "").lower()
-            score = 0
-            
-            # Check for word overlap
-            query_words = set(query_lower.split())
-            stored_words = set(stored_query.split())
-            overlap = len(query_words & stored_words)
-            score = overlap
-            
-            if score > best_score:
-                best_score = score
-                best_match = entry
+        # Find best matching query in mock data by word overlap, touching only
+        # the stored searches that share at least one word with the query
+        overlaps = Counter()
+        for word in query_words:
+            overlaps.update(word_index.get(word, ()))
+        if overlaps:
+            # Highest overlap wins; ties go to the earliest stored search
+            position, best_score = min(overlaps.items(), key=lambda item: (-item[1], item[0]))
+            best_match = _get_query_index()[position].entry
         
         if not best_match or best_score < 1:
             return f"No web search results found for: '{query}'. Try different keywords."
@@ -70,8 +138,7 @@ def web_search(query: str) -> str:
         return f"Error performing web search: {str(e)}"
 
 
-@tool("Get Recent News")
-def get_recent_news(topic: str) -> str:
+def _get_recent_news(topic: str) -> str:
     """
     Get recent pharmaceutical news on a specific topic.
     
@@ -82,24 +149,14 @@ def get_recent_news(topic: str) -> str:
         Recent news articles related to the topic.
     """
     try:
-        data = _load_web_data()
-        topic_lower = topic.lower()
-        
-        all_results = []
+        news = _news_for_topic(topic.lower())
         
-        for entry in data:
-            for result in entry.get("results", []):
-                # Check if topic appears in title or snippet
-                if (topic_lower in result.get("title", "").lower() or 
-                    topic_lower in result.get("snippet", "").lower()):
-                    all_results.append(result)
-        
-        if not all_results:
+        if not news:
             return f"No recent news found for topic: '{topic}'"
         
         output = [f"**Recent News on '{topic}':**\n"]
         
-        for result in all_results[:5]:
+        for result in news:
             output.append(
                 f"📰 **{result['title']}**\n"
                 f"   {result['snippet']}\n"
@@ -110,3 +167,21 @@ def get_recent_news(topic: str) -> str:
     
     except Exception as e:
         return f"Error getting news: {str(e)}"
+
+
+# crewai is slow to import, so the tools are only built on first access (PEP 562)
+# and the data helpers above stay importable without it
+_LAZY_TOOLS = {
+    "web_search": ("Web Search", _web_search),
+    "get_recent_news": ("Get Recent News", _get_recent_news),
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_TOOLS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from crewai.tools import tool
+    tool_name, func = _LAZY_TOOLS[name]
+    wrapped = tool(tool_name)(func)
+    globals()[name] = wrapped
+    return wrapped